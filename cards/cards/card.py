@@ -2,7 +2,6 @@
 Classes for representing and using cards.
 """
 
-import copy
 import random
 from aenum import Enum
 from termcolor import colored
@@ -28,51 +27,66 @@ class Suit(Enum):
 class Card:
     """
     Class for representing a playing card.
+
+    Cards are flyweights: all 52 cards are built once and interned by an integer id
+    from 0 to 51, so ``Card(suit, number)`` always returns the same shared object.
+    Ids are in rank order, ``id = (number - 1) * 4 + (suit.value - 1)``.
     """
 
+    __slots__ = ("__id", "__suit", "__number", "__red")
+
     SUIT_WIDTH = SUIT_WIDTH
     FACEDOWN = colored("xXx", "blue")
 
-    def __init__(self, suit, number):
-        self.__suit = suit
-        self.__number = number
-        self.__checkrep()
+    def __new__(cls, suit, number):
+        try:
+            return _CARDS_BY_SUIT_NUMBER[(suit, number)]
+        except KeyError:
+            assert 1 <= number <= 13, f"number is {number}"
+            raise
 
-    def __checkrep(self):
-        assert 1 <= self.__number <= 13, f"number is {self.__number}"
+    @classmethod
+    def _intern(cls, suit, number):
+        card = object.__new__(cls)
+        card.__id = (number - 1) * 4 + (suit.value - 1)
+        card.__suit = suit
+        card.__number = number
+        card.__red = suit in [Suit.HEARTS, Suit.DIAMONDS]
+        return card
+
+    @staticmethod
+    def from_id(card_id):
+        """Returns the card with the given id."""
+        return CARDS[card_id]
+
+    def id(self):
+        """Returns the id of the card (0 to 51, in rank order)."""
+        return self.__id
 
     def is_red(self):
         """Returns True if the card is red, False if black."""
-        self.__checkrep()
-        return self.__suit in [Suit.HEARTS, Suit.DIAMONDS]
+        return self.__red
 
     def suit(self):
         """Returns the suit of the card."""
-        self.__checkrep()
         return self.__suit
 
     def number(self):
         """Returns the number of the card."""
-        self.__checkrep()
         return self.__number
 
-    # https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes
-    def __eq__(self, other):
-        """Overrides the default implementation"""
-        if isinstance(other, Card):
-            return self.number() == other.number() and self.suit() == other.suit()
-        return NotImplemented
+    def __hash__(self):
+        """Cards are interned, so the id is a perfect hash and equality is identity."""
+        return self.__id
 
-    def __ne__(self, other):
-        """Overrides the default implementation (unnecessary in Python 3)"""
-        x = self.__eq__(other)
-        if x is not NotImplemented:
-            return not x
-        return NotImplemented
+    def __reduce__(self):
+        return (Card.from_id, (self.__id,))
 
-    def __hash__(self):
-        """Overrides the default implementation"""
-        return hash(tuple(sorted(self.__dict__.items())))
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __repr__(self) -> str:
         return Card.display(self)
@@ -140,16 +154,120 @@ class Card:
         raise NotImplementedError
 
 
+CARDS = tuple(
+    Card._intern(s, n) for n in range(1, 14) for s in Suit  # pylint: disable=protected-access
+)
+_CARDS_BY_SUIT_NUMBER = {(c.suit(), c.number()): c for c in CARDS}
+
 DECK = [Card(s, n) for s in Suit for n in range(1, 14)]
 
 
+class CardSet:
+    """
+    An immutable set of cards stored as a 52 bit mask indexed by card id.
+
+    Iteration is in rank order, the same order as ``CARDS``.
+    """
+
+    __slots__ = ("__mask",)
+
+    def __init__(self, cards=(), mask=0):
+        for card in cards:
+            mask |= 1 << card.id()
+        self.__mask = mask
+
+    @staticmethod
+    def from_mask(mask):
+        """Return the CardSet with the given bit mask."""
+        return CardSet(mask=mask)
+
+    def mask(self):
+        """Return the bit mask of the set."""
+        return self.__mask
+
+    def suit(self, suit):
+        """Return the cards in the set of the given suit."""
+        return CardSet(mask=self.__mask & SUIT_MASKS[suit])
+
+    def rank(self, number):
+        """Return the cards in the set of the given number."""
+        return CardSet(mask=self.__mask & RANK_MASKS[number])
+
+    def add(self, card):
+        """Return a new set with the card added."""
+        return CardSet(mask=self.__mask | (1 << card.id()))
+
+    def remove(self, card):
+        """Return a new set with the card removed."""
+        if card not in self:
+            raise KeyError(card)
+        return CardSet(mask=self.__mask & ~(1 << card.id()))
+
+    def __contains__(self, card):
+        return isinstance(card, Card) and self.__mask >> card.id() & 1 == 1
+
+    def __len__(self):
+        return self.__mask.bit_count()
+
+    def __iter__(self):
+        mask = self.__mask
+        while mask:
+            low = mask & -mask
+            yield CARDS[low.bit_length() - 1]
+            mask ^= low
+
+    def __bool__(self):
+        return self.__mask != 0
+
+    def __or__(self, other):
+        return CardSet(mask=self.__mask | _mask_of(other))
+
+    def __and__(self, other):
+        return CardSet(mask=self.__mask & _mask_of(other))
+
+    def __sub__(self, other):
+        return CardSet(mask=self.__mask & ~_mask_of(other))
+
+    def __xor__(self, other):
+        return CardSet(mask=self.__mask ^ _mask_of(other))
+
+    def __eq__(self, other):
+        if isinstance(other, CardSet):
+            return self.__mask == other.__mask
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.__mask)
+
+    def __repr__(self) -> str:
+        return f"CardSet({list(self)})"
+
+
+def _mask_of(cards):
+    """Return the bit mask of a CardSet or an iterable of cards."""
+    if isinstance(cards, CardSet):
+        return cards.mask()
+    return CardSet(cards).mask()
+
+
+FULL_DECK_MASK = (1 << 52) - 1
+SUIT_MASKS = {s: sum(1 << c.id() for c in CARDS if c.suit() == s) for s in Suit}
+RANK_MASKS = {n: 0b1111 << ((n - 1) * 4) for n in range(1, 14)}
+FULL_DECK = CardSet(mask=FULL_DECK_MASK)
+
+
 def rest_of_deck(cards):
-    """Given a list of cards, return the rest of the deck."""
-    return [c for c in DECK if c not in cards]
+    """Given a list of cards, return the rest of the deck in rank order."""
+    return list(FULL_DECK - cards)
 
 
-def shuffled(cards):
-    """Shuffle a list of cards."""
-    shuffled_cards = copy.deepcopy(cards)
-    random.shuffle(shuffled_cards)
-    return list(shuffled_cards)
+def shuffled(cards, rng=None):
+    """
+    Shuffle a list of cards.
+
+    Cards are interned so only the list is copied. `rng` is anything with a shuffle
+    method, such as a DealEngine or random.Random, and defaults to the global stream.
+    """
+    shuffled_cards = list(cards)
+    (random if rng is None else rng).shuffle(shuffled_cards)
+    return shuffled_cards
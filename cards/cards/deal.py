@@ -0,0 +1,115 @@
+"""
+Seedable, copy-free shuffling and dealing of cards.
+"""
+
+import hashlib
+import random
+from math import factorial
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+from cards.cards.card import Card, CARDS
+
+Seed = Union[None, int, str, bytes, random.Random]
+
+
+class DealEngine:
+    """
+    A source of shuffled decks with its own random stream.
+
+    The engine never copies cards, it only reorders references to the interned cards,
+    so shuffling a deck costs one pass of Fisher-Yates.
+    """
+
+    def __init__(self, seed: Seed = None):
+        if isinstance(seed, random.Random):
+            self.__rng = seed
+        else:
+            self.__rng = random.Random(seed)
+
+    @staticmethod
+    def for_game(seed: Seed, game: int) -> "DealEngine":
+        """
+        Return the engine for game number `game` of a batch seeded with `seed`.
+
+        The stream for a game depends only on the seed and the game number, so any game
+        of a batch can be regenerated no matter how the batch was split between workers.
+        """
+        return DealEngine(game_seed(seed, game))
+
+    def rng(self) -> random.Random:
+        """Return the underlying random number generator."""
+        return self.__rng
+
+    def shuffle(self, cards: List[Card]) -> None:
+        """Shuffle a list of cards in place."""
+        self.__rng.shuffle(cards)
+
+    def shuffled(self, cards: Sequence[Card] = CARDS) -> List[Card]:
+        """Return a shuffled list of the cards without copying the cards themselves."""
+        result = list(cards)
+        self.__rng.shuffle(result)
+        return result
+
+    def choice(self, options: Sequence):
+        """Return a random element of a sequence."""
+        return self.__rng.choice(options)
+
+    def permutation_index(self, size: int = 52) -> int:
+        """Return a uniformly random permutation index for a deck of the given size."""
+        return self.__rng.randrange(factorial(size))
+
+
+def game_seed(seed: Seed, game: int) -> int:
+    """Derive the independent seed for game number `game` of a batch."""
+    if isinstance(seed, random.Random):
+        raise TypeError("Batches must be seeded with a value, not a generator")
+    digest = hashlib.sha256(f"{seed!r}:{game}".encode()).digest()
+    return int.from_bytes(digest, "big")
+
+
+def partition_games(games: int, workers: int) -> List[range]:
+    """Split `games` game numbers into `workers` contiguous, non-overlapping ranges."""
+    if workers < 1:
+        raise ValueError("There must be at least one worker")
+    size, extra = divmod(games, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        stop = start + size + (1 if worker < extra else 0)
+        ranges.append(range(start, stop))
+        start = stop
+    return ranges
+
+
+def game_engines(seed: Seed, games: range) -> Iterator[Tuple[int, DealEngine]]:
+    """Yield the game number and its engine for each game in a range of a batch."""
+    for game in games:
+        yield game, DealEngine.for_game(seed, game)
+
+
+def deck_from_permutation_index(index: int, cards: Optional[Sequence[Card]] = None) -> List[Card]:
+    """
+    Return the permutation of the cards with the given index (0 to n! - 1).
+
+    The index is the Lehmer code of the permutation relative to the order of `cards`,
+    which defaults to the cards in id order.
+    """
+    remaining = list(CARDS if cards is None else cards)
+    if not 0 <= index < factorial(len(remaining)):
+        raise ValueError(f"Permutation index {index} out of range")
+    deck = []
+    for position in range(len(remaining), 0, -1):
+        digit, index = divmod(index, factorial(position - 1))
+        deck.append(remaining.pop(digit))
+    return deck
+
+
+def permutation_index(deck: Sequence[Card], cards: Optional[Sequence[Card]] = None) -> int:
+    """Return the index of a permutation of the cards, see deck_from_permutation_index."""
+    remaining = list(CARDS if cards is None else cards)
+    index = 0
+    for position, card in enumerate(deck):
+        digit = remaining.index(card)
+        index += digit * factorial(len(deck) - position - 1)
+        del remaining[digit]
+    return index
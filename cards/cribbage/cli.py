@@ -8,6 +8,7 @@ from cards.cribbage import cribbage
 from cards.cribbage import discards
 from cards.cribbage import pegging
 from cards.cribbage import scoring
+from cards.cards.deal import DealEngine
 
 
 def main():
@@ -18,19 +19,21 @@ def main():
     print()
 
     parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible deals")
     subparsers = parser.add_subparsers(dest="game")
     subparsers.add_parser("discard")
     subparsers.add_parser("pegging")
     subparsers.add_parser("score")
     args = parser.parse_args()
+    deal_engine = None if args.seed is None else DealEngine(args.seed)
 
     if args.game == "discard":
-        return discards.main()
+        return discards.main(deal_engine)
     if args.game == "pegging":
-        return pegging.main()
+        return pegging.main(deal_engine)
     if args.game == "score":
-        return scoring.main()
-    return cribbage.main()
+        return scoring.main(deal_engine)
+    return cribbage.main(deal_engine)
 
 
 if __name__ == "__main__":
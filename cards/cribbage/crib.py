@@ -0,0 +1,311 @@
+"""
+Exact expected crib scores for a discard.
+
+The crib holds the two discarded cards, the two cards the other player throws and the
+starter. Here the other player's throw is a uniformly random pair of the cards the
+discarder cannot see and the starter is uniform over the rest, and every combination is
+counted exactly. Fifteens, pairs and runs only depend on ranks, so the combinations are
+grouped by the ranks of the thrown pair and the starter (1,183 groups instead of
+45,540 combinations for a full deck); crib flushes and his nobs are counted by suit.
+
+The other player does not throw at random though. OpponentCribValue samples the other
+player's hand instead and weights its throws with an opponent policy, still counting
+every starter exactly.
+"""
+
+import math
+import functools
+import itertools
+import multiprocessing
+from math import comb
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from cards.cards.card import Card, CardSet, Suit, CARDS, JACK, rest_of_deck
+from cards.cards.deal import DealEngine, game_seed
+from cards.cribbage.hand import Hand
+from cards.cribbage.scoring import RANK_BITS, score_ranks
+from cards.cribbage.discard_book import lookup_discards
+from cards.cribbage.discard_cache import DiscardCache
+
+Discard2 = Sequence[Card]
+CribValue = Callable[[Discard2, Sequence[Card], bool], float]
+
+
+@functools.lru_cache(maxsize=65536)
+def _rank_total(discard_key: int, counts: Tuple[int, ...]) -> int:
+    """
+    Sum the rank scores of the crib over every thrown pair and starter.
+
+    counts[n - 1] is the number of remaining cards of number n.
+    """
+    total = 0
+    for x in range(13):
+        nx = counts[x]
+        if nx == 0:
+            continue
+        for y in range(x, 13):
+            ny = counts[y]
+            if x == y:
+                pairs = nx * (nx - 1) // 2
+            else:
+                pairs = nx * ny
+            if pairs == 0:
+                continue
+            pair_key = discard_key + RANK_BITS[x + 1] + RANK_BITS[y + 1]
+            for z in range(13):
+                starters = counts[z] - (z == x) - (z == y)
+                if starters > 0:
+                    total += pairs * starters * score_ranks(pair_key + RANK_BITS[z + 1])
+    return total
+
+
+def crib_expectation(discard: Discard2, remaining_deck: Sequence[Card]) -> float:
+    """
+    Return the exact expected score of a crib holding the discard.
+
+    The other two crib cards are a uniformly random pair of remaining_deck and the
+    starter is uniform over the rest of remaining_deck.
+    """
+    size = len(remaining_deck)
+    if size < 3:
+        raise ValueError("The remaining deck must have at least 3 cards")
+    outcomes = comb(size, 2) * (size - 2)
+    counts = [0] * 13
+    suit_counts = {suit: 0 for suit in Suit}
+    for card in remaining_deck:
+        counts[card.number() - 1] += 1
+        suit_counts[card.suit()] += 1
+    discard_key = RANK_BITS[discard[0].number()] + RANK_BITS[discard[1].number()]
+    total = _rank_total(discard_key, tuple(counts))
+
+    # A crib flush needs the discard, the thrown pair and the starter all in one suit.
+    if discard[0].suit() is discard[1].suit():
+        same = suit_counts[discard[0].suit()]
+        total += 5 * comb(same, 2) * (same - 2)
+
+    # His nobs needs the jack of the starter's suit in the crib.
+    remaining = set(remaining_deck)
+    for suit in Suit:
+        jack = Card(suit, JACK)
+        if jack in discard:
+            total += suit_counts[suit] * comb(size - 1, 2)
+        elif jack in remaining:
+            total += (suit_counts[suit] - 1) * (size - 2)
+    return total / outcomes
+
+
+def exact_crib_value(
+    discard: Discard2, remaining_deck: Sequence[Card], players_crib: bool = False
+) -> float:
+    """Return the expected crib score for the discarder, negative for the other crib."""
+    value = crib_expectation(discard, remaining_deck)
+    return value if players_crib else -value
+
+
+def _crib_expectation_args(args) -> float:
+    return crib_expectation(*args)
+
+
+def crib_expectations_batch(
+    decisions: Sequence[Tuple[Discard2, Sequence[Card]]], processes: Optional[int] = None
+) -> List[float]:
+    """Return crib_expectation for each (discard, remaining_deck) across a process pool."""
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_crib_expectation_args, decisions, chunksize=16)
+
+
+def exact_crib_table(processes: Optional[int] = None) -> Dict[int, Dict[int, float]]:
+    """
+    Return the expected crib for each pair of discarded numbers, in discard_table's layout.
+
+    The discarder's other four cards are unknown, so the rest of the crib comes from the
+    other 50 cards. Each cell averages over the suits the two discarded cards can have.
+    """
+    cells = []
+    decisions = []
+    for x, y in itertools.combinations_with_replacement(range(1, 14), 2):
+        for first, second in itertools.product(Suit, repeat=2):
+            if x == y and first.value >= second.value:
+                continue
+            discard = (Card(first, x), Card(second, y))
+            cells.append((x, y))
+            decisions.append((discard, [c for c in CARDS if c not in discard]))
+    values = crib_expectations_batch(decisions, processes)
+    sums: Dict[Tuple[int, int], List[float]] = {}
+    for cell, value in zip(cells, values):
+        sums.setdefault(cell, []).append(value)
+    table: Dict[int, Dict[int, float]] = {x: {} for x in range(1, 14)}
+    for (x, y), cell_values in sums.items():
+        table[x][y] = table[y][x] = sum(cell_values) / len(cell_values)
+    return table
+
+
+# An opponent policy returns each throw from a six card hand with its probability.
+Throws = List[Tuple[Tuple[Card, Card], float]]
+OpponentPolicy = Callable[[Hand, bool], Throws]
+
+
+def uniform_policy(hand: Hand, players_crib: bool) -> Throws:
+    """Throw each pair with the same probability."""
+    del players_crib
+    return [(throw, 1 / 15) for throw in itertools.combinations(hand.cards(), 2)]
+
+
+def _lookup_rank(hand: Hand, remaining_deck: List[Card], players_crib: bool):
+    del remaining_deck
+    return lookup_discards(hand, players_crib)
+
+
+class RankedPolicy:
+    """
+    Throw pairs according to the opponent's own rank_discards.
+
+    Each throw is weighted by exp((value - best value) / temperature), where a value is
+    the hand score plus the crib score of the throw. A temperature of 0 always makes the
+    best throw, splitting ties evenly. Rankings come from the discard book when it has been
+    built and are cached by canonical hand.
+    """
+
+    def __init__(self, temperature: float = 1.0, maxsize: int = 65536):
+        self.__temperature = temperature
+        self.__cache = DiscardCache(maxsize, rank=_lookup_rank)
+
+    def __call__(self, hand: Hand, players_crib: bool) -> Throws:
+        discards = self.__cache.rank_discards(hand, rest_of_deck(hand.cards()), players_crib)
+        values = [d.hand_score + d.crib_score for d in discards]
+        best = values[0]
+        if self.__temperature == 0:
+            weights = [1.0 if v == best else 0.0 for v in values]
+        else:
+            weights = [math.exp((v - best) / self.__temperature) for v in values]
+        total = sum(weights)
+        return [(d.discard, w / total) for d, w in zip(discards, weights) if w > 0]
+
+
+POLICIES: Dict[str, Callable[[], OpponentPolicy]] = {
+    "uniform": lambda: uniform_policy,
+    "ranked": RankedPolicy,
+    "greedy": functools.partial(RankedPolicy, 0.0),
+}
+
+
+def _thrown_crib_total(
+    discard_key: int,
+    discard: Discard2,
+    throw: Tuple[Card, Card],
+    starter_numbers: Sequence[int],
+    starter_suits: Dict[Suit, int],
+) -> int:
+    """Sum the score of the crib over the starters, given by their counts per number and suit."""
+    key = discard_key + RANK_BITS[throw[0].number()] + RANK_BITS[throw[1].number()]
+    total = 0
+    for number in range(1, 14):
+        count = starter_numbers[number - 1]
+        if count:
+            total += count * score_ranks(key + RANK_BITS[number])
+    crib = (*discard, *throw)
+    suit = crib[0].suit()
+    if all(card.suit() is suit for card in crib):
+        total += 5 * starter_suits[suit]
+    for card in crib:
+        if card.number() == JACK:
+            total += starter_suits[card.suit()]
+    return total
+
+
+class OpponentCribValue:
+    """
+    The expected crib for a discard when the other player throws by a policy.
+
+    The other player's hand is sampled from the remaining deck and the starter is
+    enumerated over the rest. Samples depend only on the seed and the remaining deck, so
+    the 15 discards of a hand are valued against the same opponent hands and the policy is
+    only evaluated once per opponent hand. An instance can be passed as the crib_value of
+    rank_discards.
+    """
+
+    def __init__(self, policy: str = "ranked", samples: int = 200, seed=0):
+        self.__policy = POLICIES[policy]()
+        self.__samples = samples
+        self.__seed = seed
+        self.__key = None
+        self.__throws: List[Tuple[List[int], Dict[Suit, int], Throws]] = []
+
+    def __call__(
+        self, discard: Discard2, remaining_deck: Sequence[Card], players_crib: bool = False
+    ) -> float:
+        value = self.crib_expectation(discard, remaining_deck, players_crib)
+        return value if players_crib else -value
+
+    def crib_expectation(
+        self, discard: Discard2, remaining_deck: Sequence[Card], players_crib: bool = False
+    ) -> float:
+        """Return the expected score of the crib holding the discard."""
+        discard_key = RANK_BITS[discard[0].number()] + RANK_BITS[discard[1].number()]
+        total = 0.0
+        for starter_numbers, starter_suits, throws in self.__sample(remaining_deck, players_crib):
+            starters = sum(starter_numbers)
+            for throw, weight in throws:
+                crib = _thrown_crib_total(
+                    discard_key, discard, throw, starter_numbers, starter_suits
+                )
+                total += weight * crib / starters
+        return total / self.__samples
+
+    def split_values(
+        self, original_hand: Hand, remaining_deck: Sequence[Card], players_crib: bool = False
+    ) -> List[float]:
+        """Return the crib value of each discard, in itertools.combinations order."""
+        return [
+            self(discard, remaining_deck, players_crib)
+            for discard in itertools.combinations(original_hand.cards(), 2)
+        ]
+
+    def __sample(self, remaining_deck: Sequence[Card], players_crib: bool):
+        remaining = CardSet(remaining_deck)
+        key = (remaining.mask(), players_crib)
+        if key != self.__key:
+            engine = DealEngine(game_seed(self.__seed, remaining.mask()))
+            cards = list(remaining)
+            self.__throws = []
+            for _ in range(self.__samples):
+                hand = engine.rng().sample(cards, 6)
+                starter_numbers = [0] * 13
+                starter_suits = {suit: 0 for suit in Suit}
+                for card in remaining - CardSet(hand):
+                    starter_numbers[card.number() - 1] += 1
+                    starter_suits[card.suit()] += 1
+                # The other player throws to their own crib when it is not ours.
+                throws = self.__policy(Hand(hand), not players_crib)
+                self.__throws.append((starter_numbers, starter_suits, throws))
+            self.__key = key
+        return self.__throws
+
+
+_worker_value: Optional[OpponentCribValue] = None
+
+
+def _init_worker(policy: str, samples: int, seed) -> None:
+    global _worker_value  # pylint: disable=global-statement
+    _worker_value = OpponentCribValue(policy, samples, seed)
+
+
+def _split_values_args(args) -> List[float]:
+    return _worker_value.split_values(*args)
+
+
+def opponent_crib_values_batch(
+    decisions: Sequence[Tuple[Hand, Sequence[Card], bool]],
+    policy: str = "ranked",
+    samples: int = 200,
+    seed=0,
+    processes: Optional[int] = None,
+) -> List[List[float]]:
+    """
+    Return split_values for each (hand, remaining_deck, players_crib) across a process pool.
+
+    Each worker keeps one policy for all of its decisions, so the opponent rankings it
+    caches are shared between decisions.
+    """
+    with multiprocessing.Pool(processes, _init_worker, (policy, samples, seed)) as pool:
+        return pool.map(_split_values_args, decisions, chunksize=8)
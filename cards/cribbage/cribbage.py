@@ -2,18 +2,18 @@
 Game of Cribbage
 """
 
-from typing import List
+from typing import List, Optional
 from enum import Enum
 
-from cards.cards.card import Card, shuffled, DECK, rest_of_deck
+from cards.cards.card import Card, shuffled, rest_of_deck, DECK
+from cards.cards.deal import DealEngine
 from cards.cribbage.hand import Hand
-from cards.cribbage.discards import (
-    rank_discards,
-    parse_discard,
-)
+from cards.cribbage.crib import OpponentCribValue
+from cards.cribbage.discards import parse_discard, rank_discards_within
+from cards.cribbage.discard_book import lookup_discards
 from cards.cribbage.players import Player
 from cards.cribbage.pegging import parse_pegging, CardsInPlay, play_ai
-from cards.cribbage.scoring import score_hand
+from cards.cribbage.scoring import score_hand_total
 
 
 class PlayState(Enum):
@@ -29,8 +29,9 @@ class PlayState(Enum):
 class Cribbage:
     """A class to represent a game of Cribbage."""
 
-    def __init__(self, deck):
+    def __init__(self, deck, deal_engine: Optional[DealEngine] = None):
         self.__deck = deck
+        self.__deal_engine = deal_engine
         self.__hands = {Player.PLAYER1: None, Player.PLAYER2: None}
         self._played_cards = CardsInPlay()
         self.__points = {Player.PLAYER1: 0, Player.PLAYER2: 0}
@@ -41,7 +42,7 @@ class Cribbage:
 
     def deal(self):
         self.__dealer = Player.PLAYER1 if self.__dealer == Player.PLAYER2 else Player.PLAYER2
-        self.__deck = shuffled(self.__deck)
+        self.__deck = shuffled(self.__deck, self.__deal_engine)
         self.__hands[Player.PLAYER1] = Hand(self.__deck[:6])
         self.__hands[Player.PLAYER2] = Hand(self.__deck[6:12])
         self._played_cards = CardsInPlay()
@@ -64,7 +65,7 @@ class Cribbage:
         def hand_score(hand: Hand) -> str:
             if self.__state not in [PlayState.SHOW, PlayState.COMPLETE]:
                 return ""
-            return " = " + str(score_hand(hand, self.__starter)[0]).rjust(2)
+            return " = " + str(score_hand_total(hand, self.__starter)).rjust(2)
 
         result = "-" * 40 + "\n"
         if self.__state == PlayState.PEGGING:
@@ -130,10 +131,10 @@ class Cribbage:
     def count_hands(self):
         for player in [self.opponent(self.__dealer), self.__dealer]:
             self.__hands[player] = Hand(self._played_cards.return_cards(player), is_crib=False)
-            points, _ = score_hand(self.__hands[player], self.__starter)
+            points = score_hand_total(self.__hands[player], self.__starter)
             self.__points[player] += points
             self.check_for_win()
-        crib_points, _ = score_hand(self.__crib, self.__starter)
+        crib_points = score_hand_total(self.__crib, self.__starter)
         self.__points[self.__dealer] += crib_points
         self.check_for_win()
         self._played_cards = CardsInPlay()
@@ -154,9 +155,8 @@ class CribbageAI:
         self.__game = game
 
     def discard(self):
-        discards = rank_discards(
+        discards = lookup_discards(
             self.__game.hand(Player.PLAYER2),
-            rest_of_deck(self.__game.hand(Player.PLAYER2).cards()),
             self.__game.dealer() == Player.PLAYER2,
         )
         discard = discards[0].discard
@@ -174,22 +174,45 @@ class CribbageAI:
 
 class CribbageHelper:
 
-    def __init__(self):
-        self.__game = Cribbage(shuffled(DECK))
+    def __init__(self, deal_engine: Optional[DealEngine] = None, hint_deadline_ms: float = 250):
+        self.__game = Cribbage(shuffled(DECK, deal_engine), deal_engine)
         self.__ai = CribbageAI(self.__game)
+        self.__hint_deadline_ms = hint_deadline_ms
+        self.__crib_value = OpponentCribValue("ranked", samples=100)
 
     def parse_input(self, input_str) -> bool:
         if input_str == "exit":
             exit()
         if input_str == "help":
-            print("Commands: exit, help")
+            print("Commands: exit, help, hint (while discarding)")
             return True
         return False
 
+    def hint(self):
+        """Print the best discards found within the hint deadline."""
+        hand = self.__game.hand(Player.PLAYER1)
+        ranking = rank_discards_within(
+            hand,
+            rest_of_deck(hand.cards()),
+            self.__game.dealer() == Player.PLAYER1,
+            self.__crib_value,
+            self.__hint_deadline_ms,
+        )
+        for discard in ranking.discards[:3]:
+            print(
+                f"{discard.discard[0]} {discard.discard[1]}: "
+                f"{discard.hand_score + discard.crib_score:.2f}"
+            )
+        if not ranking.exact:
+            print("(ran out of time, the ranking is approximate)")
+
     def discarding(self):
         print(self.__game.display())
         while True:
             response = input("Discard: ")
+            if response == "hint":
+                self.hint()
+                continue
             if self.parse_input(response):
                 continue
             success, discards = parse_discard(response, self.__game.hand(Player.PLAYER1))
@@ -249,9 +272,9 @@ class CribbageHelper:
             print("You lose!")
 
 
-def main():
+def main(deal_engine: Optional[DealEngine] = None):
     """Play a game of Cribbage."""
-    ch = CribbageHelper()
+    ch = CribbageHelper(deal_engine)
     ch.play()
 
 
@@ -0,0 +1,287 @@
+"""
+A precomputed book of discard rankings for every six card hand.
+
+Relabeling suits does not change how a hand scores, so the 20,358,520 six card hands
+collapse to 962,988 canonical ones. For each canonical hand the book stores the hand
+score summed over the 46 possible starters for each of the 15 splits. The crib value is
+the only part of a ranking that depends on whose crib it is, and it is valued at lookup
+(with the static discard table by default), so one record answers for both the dealer
+and the pone.
+
+File layout: a 16 byte header with the magic and the number of hands (uint32), the
+sorted canonical keys (uint64) and then 15 uint16 sums per hand, all in native byte
+order. Lookups are a binary search of the mapped keys.
+"""
+
+import os
+import mmap
+import time
+import array
+import bisect
+import hashlib
+import struct
+import argparse
+import itertools
+import multiprocessing
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cards.cards.card import Card, CardSet, Suit, rest_of_deck
+from cards.cribbage.hand import Hand
+from cards.cribbage.discards import (
+    Discard,
+    SPLITS,
+    rank_discards,
+    split_score_sums,
+    table_crib_value,
+)
+
+MAGIC = b"CRIBDSC1"
+HEADER = struct.Struct("=8sI4x")
+RECORD_LENGTH = len(SPLITS)
+STARTERS = 46
+
+DEFAULT_PATH = os.environ.get(
+    "CARDS_DISCARD_BOOK", os.path.join(os.path.dirname(__file__), "data", "discard_book.bin")
+)
+
+_RANK_MASK = 0b1111111111111
+_SUITS = list(Suit)
+_RECORD_INDEX = {split: i for i, split in enumerate(SPLITS)}
+
+
+def suit_masks(cards: Iterable[Card]) -> List[int]:
+    """Return a 13 bit mask of the numbers held in each suit, in Suit order."""
+    masks = [0, 0, 0, 0]
+    for card in cards:
+        masks[card.suit().value - 1] |= 1 << (card.number() - 1)
+    return masks
+
+
+def canonical_suit_order(*card_groups: Sequence[Card]) -> List[int]:
+    """
+    Return the suit indices ordered so that relabeling them 0, 1, 2, 3 is canonical.
+
+    Suits are ordered by their masks in each group, the first group first. Suits with the
+    same masks in every group are interchangeable, so ties can be broken arbitrarily.
+    """
+    group_masks = [suit_masks(cards) for cards in card_groups]
+    return sorted(range(4), key=lambda s: [m[s] for m in group_masks], reverse=True)
+
+
+def canonical_key(cards: Sequence[Card]) -> int:
+    """Return the key of the canonical form of a hand under suit relabeling."""
+    masks = sorted(suit_masks(cards), reverse=True)
+    return masks[0] << 39 | masks[1] << 26 | masks[2] << 13 | masks[3]
+
+
+def canonical_cards(key: int) -> List[Card]:
+    """Return the cards of the canonical hand with the given key, in id order."""
+    cards = []
+    for slot in range(4):
+        mask = key >> (39 - 13 * slot) & _RANK_MASK
+        cards.extend(Card(_SUITS[slot], n) for n in range(1, 14) if mask >> (n - 1) & 1)
+    return list(CardSet(cards))
+
+
+def canonical_keys() -> List[int]:
+    """Return the keys of every canonical six card hand in increasing order."""
+    masks_by_size: Dict[int, List[int]] = {}
+    for mask in range(1 << 13):
+        masks_by_size.setdefault(mask.bit_count(), []).append(mask)
+    keys = []
+
+    def extend(key: int, slot: int, largest: int, left: int):
+        if slot == 4:
+            if left == 0:
+                keys.append(key)
+            return
+        for size in range(left + 1):
+            for mask in masks_by_size[size]:
+                if mask <= largest:
+                    extend(key << 13 | mask, slot + 1, mask, left - size)
+
+    extend(0, 0, _RANK_MASK, 6)
+    keys.sort()
+    return keys
+
+
+def canonical_split_order(cards: Sequence[Card], order: Sequence[int]) -> List[int]:
+    """
+    Return, for each split of the cards in combinations order, its canonical index.
+
+    order is the canonical suit order from canonical_suit_order. Canonical splits are
+    in the combinations order of the relabeled hand, whose cards are sorted by id.
+    """
+    slot = {suit: i for i, suit in enumerate(order)}
+    canonical_ids = [(c.number() - 1) * 4 + slot[c.suit().value - 1] for c in cards]
+    position = {i: p for p, i in enumerate(sorted(canonical_ids))}
+    return [
+        _RECORD_INDEX[tuple(sorted((position[canonical_ids[i]], position[canonical_ids[j]])))]
+        for i, j in SPLITS
+    ]
+
+
+def _compute_chunk(args: Tuple[List[int], str]) -> str:
+    """Compute the records for a chunk of canonical keys and write them to a part file."""
+    keys, part_path = args
+    records = array.array("H")
+    for key in keys:
+        cards = canonical_cards(key)
+        records.extend(split_score_sums(cards, rest_of_deck(cards)))
+    temporary_path = part_path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        records.tofile(f)
+    os.replace(temporary_path, part_path)
+    return part_path
+
+
+def build_discard_book(
+    path: str = DEFAULT_PATH,
+    processes: Optional[int] = None,
+    chunk_size: int = 10000,
+    work_dir: Optional[str] = None,
+    keys: Optional[List[int]] = None,
+) -> None:
+    """
+    Compute the book across a process pool and write it to path.
+
+    Each chunk of hands is checkpointed to a part file in work_dir, so an interrupted
+    build picks up where it left off when it is run again. Part files are named by a
+    hash of the keys and the chunk size, so a build with other keys or chunks never
+    reuses them. keys restricts the book to some canonical hands and defaults to all of
+    them.
+    """
+    if work_dir is None:
+        work_dir = path + ".parts"
+    os.makedirs(work_dir, exist_ok=True)
+    keys = canonical_keys() if keys is None else sorted(keys)
+    digest = hashlib.sha256(array.array("Q", keys).tobytes()).hexdigest()[:16]
+    prefix = os.path.join(work_dir, f"{digest}-{len(keys)}-{chunk_size}")
+    chunks = [
+        (keys[start : start + chunk_size], f"{prefix}-{start // chunk_size:05d}.bin")
+        for start in range(0, len(keys), chunk_size)
+    ]
+    todo = [chunk for chunk in chunks if not os.path.exists(chunk[1])]
+    print(f"{len(chunks) - len(todo)} of {len(chunks)} chunks already computed")
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        for done, part_path in enumerate(pool.imap_unordered(_compute_chunk, todo), 1):
+            elapsed = time.perf_counter() - start
+            print(f"{part_path}: {done}/{len(todo)} chunks in {elapsed:.0f}s")
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        array.array("Q", keys).tofile(f)
+        for _, part_path in chunks:
+            with open(part_path, "rb") as part:
+                f.write(part.read())
+    os.replace(temporary_path, path)
+    for _, part_path in chunks:
+        os.remove(part_path)
+    if not os.listdir(work_dir):
+        os.rmdir(work_dir)
+
+
+class DiscardBook:
+    """A read-only, memory-mapped discard book."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(path, "rb") as f:
+            self.__data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = (
+            HEADER.unpack_from(self.__data) if len(self.__data) >= HEADER.size else (b"", 0)
+        )
+        keys_end = HEADER.size + 8 * count
+        if magic != MAGIC or len(self.__data) != keys_end + 2 * RECORD_LENGTH * count:
+            self.__data.close()
+            raise ValueError(f"{path} is not a discard book")
+        view = memoryview(self.__data)
+        self.__keys = view[HEADER.size : keys_end].cast("Q")
+        self.__records = view[keys_end:].cast("H")
+
+    def split_sums(self, cards: Sequence[Card]) -> List[int]:
+        """
+        Return the hand score summed over the 46 starters for each split of six cards.
+
+        The sums are in the order of itertools.combinations(cards, 2) for the discards.
+        """
+        key = canonical_key(cards)
+        index = bisect.bisect_left(self.__keys, key)
+        if index == len(self.__keys) or self.__keys[index] != key:
+            raise KeyError(f"{list(cards)} is not in the discard book")
+        record = self.__records[index * RECORD_LENGTH : (index + 1) * RECORD_LENGTH]
+        return [record[i] for i in canonical_split_order(cards, canonical_suit_order(cards))]
+
+    def rank_discards(
+        self,
+        original_hand: Hand,
+        players_crib: bool = False,
+        crib_value: Optional[Callable[..., float]] = None,
+    ) -> List[Discard]:
+        """Return the same ranking as rank_discards against the rest of the deck."""
+        cards = original_hand.cards()
+        assert len(cards) == 6
+        card_set = original_hand.card_set()
+        remaining_deck = rest_of_deck(cards)
+        if crib_value is None:
+            crib_value = table_crib_value
+        discards = [
+            Discard(
+                Hand(card_set - discard_cards),
+                discard_cards,
+                total / STARTERS,
+                crib_value(discard_cards, remaining_deck, players_crib),
+            )
+            for discard_cards, total in zip(
+                itertools.combinations(cards, 2), self.split_sums(cards)
+            )
+        ]
+        discards.sort(key=lambda d: d.hand_score + d.crib_score, reverse=True)
+        return discards
+
+
+_default_book: Optional[DiscardBook] = None
+_default_book_loaded = False
+
+
+def default_book() -> Optional[DiscardBook]:
+    """Return the book at the default path, or None if it has not been built."""
+    global _default_book, _default_book_loaded  # pylint: disable=global-statement
+    if not _default_book_loaded:
+        _default_book_loaded = True
+        if os.path.exists(DEFAULT_PATH):
+            _default_book = DiscardBook(DEFAULT_PATH)
+    return _default_book
+
+
+def lookup_discards(
+    original_hand: Hand,
+    players_crib: bool = False,
+    crib_value: Optional[Callable[..., float]] = None,
+) -> List[Discard]:
+    """
+    Rank the discards of a six card hand against the rest of the deck.
+
+    Answers from the discard book if it has been built and computes them otherwise.
+    """
+    book = default_book()
+    if book is None:
+        remaining_deck = rest_of_deck(original_hand.cards())
+        return rank_discards(original_hand, remaining_deck, players_crib, crib_value)
+    return book.rank_discards(original_hand, players_crib, crib_value)
+
+
+def main():
+    """Build the discard book."""
+    parser = argparse.ArgumentParser(description="Build the cribbage discard book.")
+    parser.add_argument("--output", default=DEFAULT_PATH, help="where to write the book")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--work-dir", default=None, help="where to checkpoint chunks")
+    args = parser.parse_args()
+    build_discard_book(args.output, args.processes, args.chunk_size, args.work_dir)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
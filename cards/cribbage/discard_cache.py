@@ -0,0 +1,146 @@
+"""
+A two tier cache of discard rankings.
+
+Rankings are keyed by the six card hand, the cards known to be out of the deck and whose
+crib it is, all relabeled to a canonical suit order, so hands that only differ by suit
+share an entry. The first tier is a bounded in-process LRU and the optional second tier
+is a SQLite file that survives restarts and can be opened read-only by many processes.
+"""
+
+import json
+import sqlite3
+import itertools
+from collections import OrderedDict, namedtuple
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from cards.cards.card import Card, CardSet, FULL_DECK
+from cards.cribbage.hand import Hand
+from cards.cribbage.discards import Discard, rank_discards
+from cards.cribbage.discard_book import canonical_split_order, canonical_suit_order, suit_masks
+
+CacheStats = namedtuple("CacheStats", "hits disk_hits misses evictions size")
+
+# The canonical split index and the scores (every Discard field after discard) of each
+# split, in the order the ranking function returned them.
+Ranking = Tuple[Tuple[float, ...], ...]
+
+
+def _pack(masks: Sequence[int], order: Sequence[int]) -> int:
+    """Pack the suit masks in canonical suit order into one int."""
+    return masks[order[0]] << 39 | masks[order[1]] << 26 | masks[order[2]] << 13 | masks[order[3]]
+
+
+class DiscardCache:
+    """
+    A cache in front of rank_discards.
+
+    maxsize bounds the number of rankings kept in memory. If path is given, rankings are
+    also stored in a SQLite file there; with read_only the file is only read, which lets
+    several processes share one prebuilt file. rank is the ranking function being
+    cached, and a file should only be shared between caches of the same function.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        path: Optional[str] = None,
+        read_only: bool = False,
+        rank: Callable[[Hand, List[Card], bool], List[Discard]] = rank_discards,
+    ):
+        self.__maxsize = maxsize
+        self.__entries: "OrderedDict[str, Ranking]" = OrderedDict()
+        self.__rank = rank
+        self.__read_only = read_only
+        self.__hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__db = None
+        if path is not None:
+            if read_only:
+                self.__db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            else:
+                self.__db = sqlite3.connect(path)
+                with self.__db:
+                    self.__db.execute(
+                        "CREATE TABLE IF NOT EXISTS rankings (key TEXT PRIMARY KEY, value TEXT)"
+                    )
+
+    def stats(self) -> CacheStats:
+        """Return the hit, miss and eviction counts and the number of rankings in memory."""
+        return CacheStats(
+            hits=self.__hits,
+            disk_hits=self.__disk_hits,
+            misses=self.__misses,
+            evictions=self.__evictions,
+            size=len(self.__entries),
+        )
+
+    def clear(self) -> None:
+        """Empty the in-memory tier and reset the counts."""
+        self.__entries.clear()
+        self.__hits = self.__disk_hits = self.__misses = self.__evictions = 0
+
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def rank_discards(
+        self, original_hand: Hand, remaining_deck: List[Card], players_crib: bool = False
+    ) -> List[Discard]:
+        """Return the ranking of the cached function, from the cache when possible."""
+        cards = original_hand.cards()
+        assert len(cards) == 6
+        removed = list(FULL_DECK - original_hand.card_set() - CardSet(remaining_deck))
+        order = canonical_suit_order(cards, removed)
+        hand_key = _pack(suit_masks(cards), order)
+        removed_key = _pack(suit_masks(removed), order)
+        key = f"{hand_key}:{removed_key}:{int(players_crib)}"
+        splits = canonical_split_order(cards, order)
+        ranking = self.__get(key)
+        if ranking is None:
+            self.__misses += 1
+            discards = self.__rank(original_hand, remaining_deck, players_crib)
+            split_of = {
+                frozenset(discard_cards): split
+                for discard_cards, split in zip(itertools.combinations(cards, 2), splits)
+            }
+            ranking = tuple((split_of[frozenset(d.discard)], *d[2:]) for d in discards)
+            self.__put(key, ranking)
+            return discards
+        card_set = original_hand.card_set()
+        discard_of = dict(zip(splits, itertools.combinations(cards, 2)))
+        return [
+            Discard(Hand(card_set - discard_of[split]), discard_of[split], *scores)
+            for split, *scores in ranking
+        ]
+
+    def __get(self, key: str) -> Optional[Ranking]:
+        ranking = self.__entries.get(key)
+        if ranking is not None:
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return ranking
+        if self.__db is not None:
+            row = self.__db.execute("SELECT value FROM rankings WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                ranking = tuple(tuple(scores) for scores in json.loads(row[0]))
+                self.__disk_hits += 1
+                self.__remember(key, ranking)
+        return ranking
+
+    def __put(self, key: str, ranking: Ranking) -> None:
+        self.__remember(key, ranking)
+        if self.__db is not None and not self.__read_only:
+            with self.__db:
+                self.__db.execute(
+                    "INSERT OR REPLACE INTO rankings VALUES (?, ?)", (key, json.dumps(ranking))
+                )
+
+    def __remember(self, key: str, ranking: Ranking) -> None:
+        self.__entries[key] = ranking
+        if len(self.__entries) > self.__maxsize:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
@@ -0,0 +1,173 @@
+"""
+Rank discards by sampling instead of enumerating.
+
+Each sample deals the other player a hand from the remaining deck, lets an opponent policy
+pick their throw and scores every split of the hand with the same opponent hand, throw and
+starters, so differences between splits are measured on common random numbers. Starters
+are stratified by number: a sample scores one starter of each number still in the deck,
+weighted by how many of that number are left. Sampling stops once the leading split is
+separated from the runner-up at the requested confidence.
+"""
+
+import math
+import random
+import itertools
+from statistics import NormalDist
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from cards.cards.card import Card, CardSet, Suit, JACK
+from cards.cards.deal import DealEngine
+from cards.cribbage.hand import Hand
+from cards.cribbage.scoring import RANK_BITS, PartialHand, score_ranks
+from cards.cribbage.discards import Discard
+from cards.cribbage.crib import POLICIES, OpponentPolicy
+
+SampledDiscards = namedtuple("SampledDiscards", "discards half_widths samples separated")
+
+
+def z_score(confidence: float) -> float:
+    """Return the two sided normal quantile for a confidence level."""
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+class DiscardSampler:
+    """
+    Accumulates samples of the value of each split of a six card hand.
+
+    policy is the name of an opponent policy in crib.POLICIES or a policy itself.
+    """
+
+    def __init__(
+        self,
+        original_hand: Hand,
+        remaining_deck: Sequence[Card],
+        players_crib: bool = False,
+        policy: Union[str, OpponentPolicy] = "ranked",
+        seed=None,
+    ):
+        cards = original_hand.cards()
+        assert len(cards) == 6
+        card_set = original_hand.card_set()
+        self.__players_crib = players_crib
+        self.__policy = POLICIES[policy]() if isinstance(policy, str) else policy
+        self.__rng: random.Random = DealEngine(seed).rng()
+        self.__remaining = CardSet(remaining_deck)
+        self.__remaining_list = list(self.__remaining)
+        self.__discards = [tuple(d) for d in itertools.combinations(cards, 2)]
+        self.__kept = [Hand(card_set - d) for d in self.__discards]
+        self.__partials = [PartialHand(hand) for hand in self.__kept]
+        self.__hand_sums = [0.0] * len(self.__discards)
+        self.__crib_sums = [0.0] * len(self.__discards)
+        self.__totals: List[List[float]] = []
+
+    def samples(self) -> int:
+        """Return the number of samples taken."""
+        return len(self.__totals)
+
+    def sample(self) -> List[Tuple[float, float]]:
+        """Take one sample and return the hand and crib value of each split."""
+        opponent = self.__rng.sample(self.__remaining_list, 6)
+        starters: Dict[int, List[Card]] = {}
+        for card in self.__remaining - CardSet(opponent):
+            starters.setdefault(card.number(), []).append(card)
+        count = sum(len(members) for members in starters.values())
+        strata = [
+            (self.__rng.choice(members), len(members) / count) for members in starters.values()
+        ]
+
+        throws = self.__policy(Hand(opponent), not self.__players_crib)
+        throw = self.__rng.choices([t for t, _ in throws], [w for _, w in throws])[0]
+        throw_key = RANK_BITS[throw[0].number()] + RANK_BITS[throw[1].number()]
+        sign = 1 if self.__players_crib else -1
+
+        values = []
+        for i, (discard, partial) in enumerate(zip(self.__discards, self.__partials)):
+            crib = (*discard, *throw)
+            crib_key = throw_key + RANK_BITS[discard[0].number()] + RANK_BITS[discard[1].number()]
+            suits = {card.suit() for card in crib}
+            flush_suit: Optional[Suit] = suits.pop() if len(suits) == 1 else None
+            nobs_suits = {card.suit() for card in crib if card.number() == JACK}
+            hand_value = 0.0
+            crib_value = 0.0
+            for starter, weight in strata:
+                hand_value += weight * partial.score(starter)
+                crib_score = score_ranks(crib_key + RANK_BITS[starter.number()])
+                if starter.suit() is flush_suit:
+                    crib_score += 5
+                if starter.suit() in nobs_suits:
+                    crib_score += 1
+                crib_value += weight * crib_score
+            crib_value *= sign
+            self.__hand_sums[i] += hand_value
+            self.__crib_sums[i] += crib_value
+            values.append((hand_value, crib_value))
+        self.__totals.append([h + c for h, c in values])
+        return values
+
+    def run(self, samples: int) -> None:
+        """Take a number of samples."""
+        for _ in range(samples):
+            self.sample()
+
+    def separated(self, confidence: float = 0.95) -> bool:
+        """Return whether the leading split beats the runner-up at the confidence."""
+        n = len(self.__totals)
+        if n < 2:
+            return False
+        means = self.__means()
+        leader, runner_up = sorted(range(len(means)), key=lambda i: means[i], reverse=True)[:2]
+        differences = [totals[leader] - totals[runner_up] for totals in self.__totals]
+        mean = sum(differences) / n
+        variance = sum((d - mean) ** 2 for d in differences) / (n - 1)
+        return mean > z_score(confidence) * math.sqrt(variance / n)
+
+    def ranking(self, confidence: float = 0.95) -> SampledDiscards:
+        """Return the discards ranked by their sampled values with an interval for each."""
+        n = len(self.__totals)
+        if n == 0:
+            raise ValueError("At least one sample is needed")
+        z = z_score(confidence)
+        discards = []
+        for i, discard in enumerate(self.__discards):
+            values = [totals[i] for totals in self.__totals]
+            mean = sum(values) / n
+            variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else math.inf
+            half_width = z * math.sqrt(variance / n)
+            discard_result = Discard(
+                self.__kept[i], discard, self.__hand_sums[i] / n, self.__crib_sums[i] / n
+            )
+            discards.append((discard_result, half_width))
+        discards.sort(key=lambda d: d[0].hand_score + d[0].crib_score, reverse=True)
+        return SampledDiscards(
+            [d for d, _ in discards], [w for _, w in discards], n, self.separated(confidence)
+        )
+
+    def __means(self) -> List[float]:
+        n = len(self.__totals)
+        return [(h + c) / n for h, c in zip(self.__hand_sums, self.__crib_sums)]
+
+
+def sample_discards(
+    original_hand: Hand,
+    remaining_deck: Sequence[Card],
+    players_crib: bool = False,
+    policy: Union[str, OpponentPolicy] = "ranked",
+    confidence: float = 0.95,
+    min_samples: int = 32,
+    max_samples: int = 2000,
+    batch_size: int = 16,
+    seed=None,
+) -> SampledDiscards:
+    """
+    Rank the discards by sampling, stopping early once the best one is separated.
+
+    Samples are taken in batches and the stopping rule is checked after each batch from
+    min_samples on. The result reports the number of samples used, an interval half width
+    for the total value of each discard and whether the leader was separated.
+    """
+    sampler = DiscardSampler(original_hand, remaining_deck, players_crib, policy, seed)
+    sampler.run(min_samples)
+    while sampler.samples() < max_samples and not sampler.separated(confidence):
+        sampler.run(min(batch_size, max_samples - sampler.samples()))
+    return sampler.ranking(confidence)
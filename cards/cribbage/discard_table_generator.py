@@ -0,0 +1,207 @@
+"""
+Generate the crib discard tables in discard_table.py.
+
+For each pair of discarded numbers the crib is simulated: the discarder is dealt six
+cards holding the pair, the other player is dealt six of the rest and throws two of them
+according to an opponent model, and a starter is cut. The player crib table is for the
+discarder's own crib and the opponent crib table is for the other player's crib.
+
+Every cell has its own random stream derived from the seed, so the output does not depend
+on the number of processes and rerunning with the same seed is bit-identical.
+"""
+
+import math
+import array
+import argparse
+import itertools
+import multiprocessing
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cards.cards.card import Card, CARDS
+from cards.cards.deal import DealEngine
+from cards.cribbage.hand import Hand
+from cards.cribbage.scoring import score_hand_total
+from cards.cribbage.discard_book import lookup_discards
+from cards.cribbage.crib import exact_crib_table
+
+TABLES = ("player_crib_discard_table", "opponent_crib_discard_table")
+CELLS = list(itertools.combinations_with_replacement(range(1, 14), 2))
+Z_SCORES = {0.90: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+
+CellResult = namedtuple("CellResult", "table x y samples mean half_width")
+GeneratedTables = namedtuple("GeneratedTables", "means half_widths samples")
+
+# An opponent model picks the two cards to throw from a six card hand.
+OpponentModel = Callable[[Hand, bool, DealEngine], Tuple[Card, Card]]
+
+
+def cell_index(table: str, x: int, y: int) -> int:
+    """Return the index of a cell, which numbers its random stream."""
+    return TABLES.index(table) * 169 + (x - 1) * 13 + (y - 1)
+
+
+def random_opponent(hand: Hand, players_crib: bool, engine: DealEngine) -> Tuple[Card, Card]:
+    """Throw a uniformly random pair."""
+    del players_crib
+    first, second = engine.rng().sample(hand.cards(), 2)
+    return first, second
+
+
+def greedy_opponent(hand: Hand, players_crib: bool, engine: DealEngine) -> Tuple[Card, Card]:
+    """Throw the best discard from rank_discards."""
+    del engine
+    return lookup_discards(hand, players_crib=players_crib)[0].discard
+
+
+OPPONENT_MODELS: Dict[str, OpponentModel] = {
+    "random": random_opponent,
+    "greedy": greedy_opponent,
+}
+
+
+def simulate_cell(
+    table: str, x: int, y: int, samples: int, seed, opponent: str = "greedy", confidence=0.95
+) -> CellResult:
+    """Simulate the crib for a discard of numbers x and y."""
+    engine = DealEngine.for_game(seed, cell_index(table, x, y))
+    rng = engine.rng()
+    model = OPPONENT_MODELS[opponent]
+    discarders_crib = table == TABLES[0]
+    xs = [c for c in CARDS if c.number() == x]
+    ys = [c for c in CARDS if c.number() == y]
+    total = 0
+    total_squares = 0
+    for _ in range(samples):
+        first = rng.choice(xs)
+        second = rng.choice([c for c in ys if c is not first])
+        deck = [c for c in CARDS if c is not first and c is not second]
+        engine.shuffle(deck)
+        opponent_hand = Hand(deck[4:10])
+        thrown = model(opponent_hand, not discarders_crib, engine)
+        crib = Hand([first, second, *thrown], is_crib=True)
+        score = score_hand_total(crib, deck[10])
+        total += score
+        total_squares += score * score
+    mean = total / samples
+    variance = max(total_squares / samples - mean * mean, 0.0) * samples / max(samples - 1, 1)
+    half_width = Z_SCORES[confidence] * math.sqrt(variance / samples)
+    return CellResult(table, x, y, samples, mean, half_width)
+
+
+def _simulate_cell_args(args) -> CellResult:
+    return simulate_cell(*args)
+
+
+def generate_tables(
+    samples: int,
+    seed,
+    opponent: str = "greedy",
+    processes: Optional[int] = None,
+    confidence: float = 0.95,
+) -> GeneratedTables:
+    """Simulate every cell of both tables across a process pool."""
+    tasks = [
+        (table, x, y, samples, seed, opponent, confidence) for table in TABLES for x, y in CELLS
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_simulate_cell_args, tasks)
+    means: Dict[str, Dict[int, Dict[int, float]]] = {
+        t: {n: {} for n in range(1, 14)} for t in TABLES
+    }
+    half_widths: Dict[str, Dict[int, Dict[int, float]]] = {
+        t: {n: {} for n in range(1, 14)} for t in TABLES
+    }
+    for result in results:
+        for a, b in ((result.x, result.y), (result.y, result.x)):
+            means[result.table][a][b] = result.mean
+            half_widths[result.table][a][b] = result.half_width
+    return GeneratedTables(means, half_widths, samples)
+
+
+def exact_tables(processes: Optional[int] = None) -> GeneratedTables:
+    """Return both tables from the exact engine, which assumes a uniformly random throw."""
+    table = exact_crib_table(processes)
+    zeros = {x: {y: 0.0 for y in range(1, 14)} for x in range(1, 14)}
+    return GeneratedTables({t: table for t in TABLES}, {t: zeros for t in TABLES}, 0)
+
+
+def format_tables(tables: GeneratedTables, header: str) -> str:
+    """Return Python source for the tables in the layout of discard_table.py."""
+    lines = ['"""', header, '"""', ""]
+    for table in reversed(TABLES):
+        lines.append(f"{table} = {{")
+        for x in range(1, 14):
+            lines.append(f"    {x}: {{")
+            for y in range(1, 14):
+                lines.append(f"        {y}: {tables.means[table][x][y]:.2f},")
+            lines.append("    },")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def table_array(tables: GeneratedTables) -> array.array:
+    """
+    Return the tables as a flat array of doubles.
+
+    The layout is [means, half widths][player crib, opponent crib][x - 1][y - 1].
+    """
+    values = array.array("d")
+    for source in (tables.means, tables.half_widths):
+        for table in TABLES:
+            values.extend(source[table][x][y] for x in range(1, 14) for y in range(1, 14))
+    return values
+
+
+def read_table_array(path: str) -> GeneratedTables:
+    """Read tables written by table_array."""
+    values = array.array("d")
+    with open(path, "rb") as f:
+        values.frombytes(f.read())
+    parts: List[Dict[str, Dict[int, Dict[int, float]]]] = []
+    offset = 0
+    for _ in range(2):
+        part = {}
+        for table in TABLES:
+            part[table] = {
+                x: {y: values[offset + (x - 1) * 13 + (y - 1)] for y in range(1, 14)}
+                for x in range(1, 14)
+            }
+            offset += 169
+        parts.append(part)
+    return GeneratedTables(parts[0], parts[1], None)
+
+
+def main():
+    """Generate the crib discard tables."""
+    parser = argparse.ArgumentParser(description="Generate the crib discard tables.")
+    parser.add_argument("--method", choices=["simulate", "exact"], default="simulate")
+    parser.add_argument("--opponent", choices=sorted(OPPONENT_MODELS), default="greedy")
+    parser.add_argument("--samples", type=int, default=10000, help="samples per cell")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--confidence", type=float, choices=sorted(Z_SCORES), default=0.95)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", default="discard_table.py", help="python source to write")
+    parser.add_argument("--array-output", default=None, help="binary array file to write")
+    args = parser.parse_args()
+    if args.method == "exact":
+        tables = exact_tables(args.processes)
+        header = "Generated with the exact crib engine and a uniformly random opponent throw."
+    else:
+        tables = generate_tables(
+            args.samples, args.seed, args.opponent, args.processes, args.confidence
+        )
+        header = (
+            f"Generated by simulation: {args.samples} samples per cell, seed {args.seed}, "
+            f"{args.opponent} opponent."
+        )
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(format_tables(tables, header))
+    if args.array_output is not None:
+        with open(args.array_output, "wb") as f:
+            table_array(tables).tofile(f)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,24 @@ Discarding in cribbage.
 """
 
 import sys
+import time
+import heapq
+import functools
 import itertools
-from collections import namedtuple
-from typing import List, Tuple, Union
+from collections import Counter, namedtuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 from termcolor import colored
 
-from cards.cards.card import Card, Suit, shuffled
+from cards.cards.card import Card, Suit, JACK, rest_of_deck, shuffled
 from cards.cards.card_shortcuts import card_shortcut_dict
-from cards.cribbage.scoring import score_hand
+from cards.cards.deal import DealEngine
+from cards.cribbage.scoring import RANK_BITS, rank_key, score_ranks
 from cards.cribbage.hand import Hand
 from cards.cribbage.discard_table import opponent_crib_discard_table, player_crib_discard_table
 
-
-Discard = namedtuple("Discard", "hand discard hand_score crib_score")
+Discard = namedtuple("Discard", "hand discard hand_score crib_score pegging_score", defaults=(0.0,))
+AnytimeRanking = namedtuple("AnytimeRanking", "discards exact")
+TopDiscards = namedtuple("TopDiscards", "discards pruned")
 
 
 def which_cards_do_i_mean(cards_str: str, options: List[Card], suit_matters=True) -> List[Card]:
@@ -45,11 +50,12 @@ def which_cards_do_i_mean(cards_str: str, options: List[Card], suit_matters=True
 
 def display_discard(discard: Discard) -> str:
     """return a string representation of a discard"""
-    total = discard.hand_score + discard.crib_score
+    total = discard.hand_score + discard.crib_score + discard.pegging_score
     discard_cards = " ".join([str(c) for c in discard.discard])
+    pegging = f" + {discard.pegging_score:.2f}" if discard.pegging_score else ""
     return (
         f"{discard.hand.display()} -> {discard_cards}  "
-        f"({discard.hand_score:.2f} + {discard.crib_score:.2f} = {total:.2f})"
+        f"({discard.hand_score:.2f} + {discard.crib_score:.2f}{pegging} = {total:.2f})"
     )
 
 
@@ -62,33 +68,441 @@ def score_discard(
     return -1 * opponent_crib_discard_table[discard[0].number()][discard[1].number()]
 
 
+SPLITS = list(itertools.combinations(range(6), 2))
+
+
+class _SplitScorer:
+    """
+    The rank structure of six cards and the starters, shared by their 15 splits.
+
+    The six card rank key plus each starter rank is packed once, and each split
+    subtracts its discarded ranks. Starters of the same rank score the same except for
+    flush and nobs bonuses, so a split scores one class per starter rank and adds the
+    suit bonuses by count.
+    """
+
+    def __init__(self, cards: List[Card], remaining_deck: List[Card]):
+        self.__numbers = [c.number() for c in cards]
+        self.__suits = [c.suit().value for c in cards]
+        self.__key = rank_key(self.__numbers)
+        self.__starter_ranks = [
+            (self.__key + RANK_BITS[n], count)
+            for n, count in Counter(c.number() for c in remaining_deck).items()
+        ]
+        self.__suit_counts = Counter(c.suit().value for c in remaining_deck)
+        self.__starters = len(remaining_deck)
+        self.__remaining_deck = remaining_deck
+        self.__starter_suits: Optional[List[Tuple[int, Counter]]] = None
+        # Only the most held suit can make a flush in the kept cards.
+        self.__flush_suit, self.__flush_held = Counter(self.__suits).most_common(1)[0]
+        self.__jacks = [k for k, n in enumerate(self.__numbers) if n == JACK]
+
+    def __split(self, i: int, j: int) -> Tuple[int, Optional[int], List[int]]:
+        """Return the rank key, flush suit value and jack suit values of the kept cards."""
+        suits = self.__suits
+        flush_suit = self.__flush_suit
+        if self.__flush_held - (suits[i] == flush_suit) - (suits[j] == flush_suit) != 4:
+            flush_suit = None
+        nobs_suits = [suits[k] for k in self.__jacks if k not in (i, j)]
+        key = self.__key - RANK_BITS[self.__numbers[i]] - RANK_BITS[self.__numbers[j]]
+        return key, flush_suit, nobs_suits
+
+    def sum(self, i: int, j: int) -> int:
+        """Return the hand score summed over the starters when cards i and j are dropped."""
+        key, flush_suit, nobs_suits = self.__split(i, j)
+        dropped = self.__key - key
+        total = sum(score_ranks(k - dropped) * count for k, count in self.__starter_ranks)
+        total += sum(self.__suit_counts[suit] for suit in nobs_suits)
+        if flush_suit is not None:
+            total += 4 * self.__starters + self.__suit_counts[flush_suit]
+        return total
+
+    def histogram(self, i: int, j: int) -> Dict[int, int]:
+        """Return how many starters give each hand score when cards i and j are dropped."""
+        if self.__starter_suits is None:
+            starter_suits: Dict[int, Counter] = {}
+            for starter in self.__remaining_deck:
+                starter_suits.setdefault(starter.number(), Counter())[starter.suit().value] += 1
+            self.__starter_suits = [
+                (self.__key + RANK_BITS[n], s) for n, s in starter_suits.items()
+            ]
+        key, flush_suit, nobs_suits = self.__split(i, j)
+        dropped = self.__key - key
+        flush = 4 if flush_suit is not None else 0
+        histogram: Counter = Counter()
+        for key_with_starter, suit_counts in self.__starter_suits:
+            base = score_ranks(key_with_starter - dropped) + flush
+            for suit, count in suit_counts.items():
+                histogram[base + (suit == flush_suit) + (suit in nobs_suits)] += count
+        return dict(sorted(histogram.items()))
+
+    def bounds(self, i: int, j: int) -> Tuple[int, int]:
+        """Return hand_score_bounds for the cards kept when cards i and j are dropped."""
+        key, flush_suit, nobs_suits = self.__split(i, j)
+        return _hand_score_bounds(key, flush_suit is not None, bool(nobs_suits))
+
+
+def split_score_sums(cards: List[Card], remaining_deck: List[Card]) -> List[int]:
+    """
+    Return the hand score summed over the starters for each way to keep 4 of 6 cards.
+
+    The sums are in the order of itertools.combinations(cards, 2) for the discards.
+    """
+    scorer = _SplitScorer(cards, remaining_deck)
+    return [scorer.sum(i, j) for i, j in SPLITS]
+
+
+def split_score_histograms(cards: List[Card], remaining_deck: List[Card]) -> List[Dict[int, int]]:
+    """
+    Return how many starters give each hand score, for each way to keep 4 of 6 cards.
+
+    Like split_score_sums, each split scores one class per starter rank, and the suits
+    of the starters of that rank only decide the flush and nobs bonuses.
+    """
+    scorer = _SplitScorer(cards, remaining_deck)
+    return [scorer.histogram(i, j) for i, j in SPLITS]
+
+
+@functools.lru_cache(maxsize=None)
+def _best_starter_score(key: int) -> int:
+    """Return the most fifteens, pairs and runs any starter number makes with the ranks."""
+    return max(score_ranks(key + RANK_BITS[n]) for n in range(1, 14))
+
+
+def _hand_score_bounds(key: int, flush: bool, jack: bool) -> Tuple[int, int]:
+    """Return hand_score_bounds from the rank key of the kept cards."""
+    lower = score_ranks(key) + (4 if flush else 0)
+    upper = _best_starter_score(key) + (5 if flush else 0) + (1 if jack else 0)
+    return lower, upper
+
+
+def hand_score_bounds(kept: List[Card]) -> Tuple[int, int]:
+    """
+    Return bounds on the score of four kept cards with any starter.
+
+    A starter can only add points, so the cards alone are a lower bound. The upper bound
+    is the best starter number plus a flush and his nobs if the hand could make them.
+    Both come from memoized rank lookups.
+    """
+    key = rank_key(c.number() for c in kept)
+    flush = len({c.suit() for c in kept}) == 1
+    return _hand_score_bounds(key, flush, any(c.number() == JACK for c in kept))
+
+
+@functools.lru_cache(maxsize=None)
+def _crib_score_range(first: int, second: int) -> Tuple[int, int]:
+    """Return the fewest and most points of a crib holding cards of the two numbers."""
+    key = RANK_BITS[first] + RANK_BITS[second]
+    most = 0
+    for others in itertools.combinations_with_replacement(range(1, 14), 3):
+        numbers = (first, second, *others)
+        if all(numbers.count(n) <= 4 for n in others):
+            most = max(most, score_ranks(key + rank_key(others)))
+    # A flush and his nobs are counted whether or not the suits allow them.
+    return score_ranks(key), most + 6
+
+
+def crib_value_bound(
+    discard: Union[List[Card], Tuple[Card, Card]],
+    remaining_deck: List[Card],  # pylint: disable=unused-argument
+    players_crib: bool = False,
+) -> float:
+    """
+    Return an upper bound on the value of a discard to any crib value function.
+
+    It is the most a crib holding the discard can score, or less the fewest if it is
+    the other player's crib.
+    """
+    fewest, most = _crib_score_range(discard[0].number(), discard[1].number())
+    return most if players_crib else -fewest
+
+
+def table_crib_value(
+    discard: Union[List[Card], Tuple[Card, Card]],
+    remaining_deck: List[Card],  # pylint: disable=unused-argument
+    players_crib: bool = False,
+) -> float:
+    """score_discard with the signature of the other crib value functions."""
+    return score_discard(discard, players_crib=players_crib)
+
+
+SplitProfile = namedtuple(
+    "SplitProfile", "histogram starters mean variance min max crib_score pegging_score"
+)
+Objective = Callable[[SplitProfile], float]
+
+
+def split_profile(histogram: Dict[int, int], crib_score: float, pegging_score: float = 0.0):
+    """Return the summary of a hand score histogram that the objectives are computed from."""
+    starters = sum(histogram.values())
+    mean = sum(s * n for s, n in histogram.items()) / starters
+    variance = sum(n * (s - mean) ** 2 for s, n in histogram.items()) / starters
+    return SplitProfile(
+        histogram,
+        starters,
+        mean,
+        variance,
+        min(histogram),
+        max(histogram),
+        crib_score,
+        pegging_score,
+    )
+
+
+def mean_objective(profile: SplitProfile) -> float:
+    """The expected points, the default ranking."""
+    return profile.mean + profile.crib_score + profile.pegging_score
+
+
+def floor_objective(profile: SplitProfile) -> float:
+    """The points with the worst starter for the hand."""
+    return profile.min + profile.crib_score + profile.pegging_score
+
+
+def hail_mary_objective(target: int) -> Objective:
+    """Return the objective of the chance that the hand scores at least target."""
+
+    def objective(profile: SplitProfile) -> float:
+        return sum(n for s, n in profile.histogram.items() if s >= target) / profile.starters
+
+    return objective
+
+
+def mean_variance_objective(risk: float) -> Objective:
+    """Return the objective of the expected points less risk times the hand's variance."""
+
+    def objective(profile: SplitProfile) -> float:
+        return mean_objective(profile) - risk * profile.variance
+
+    return objective
+
+
+OBJECTIVES: Dict[str, Objective] = {
+    "mean": mean_objective,
+    "floor": floor_objective,
+    "hail_mary": hail_mary_objective(12),
+    "mean_variance": mean_variance_objective(0.1),
+}
+
+
+def discard_profiles(
+    original_hand: Hand,
+    remaining_deck: List[Card],
+    players_crib: bool = False,
+    crib_value: Optional[Callable[..., float]] = None,
+    pegging_value: Optional[Callable[..., float]] = None,
+) -> List[Tuple[Discard, SplitProfile]]:
+    """
+    Return each discard with the profile of its hand score over the starters.
+
+    The discards are in itertools.combinations order and every objective can be computed
+    from the profiles without scoring the hands again.
+    """
+    if crib_value is None:
+        crib_value = table_crib_value
+    cards = original_hand.cards()
+    assert len(cards) == 6
+    card_set = original_hand.card_set()
+    results = []
+    histograms = split_score_histograms(cards, remaining_deck)
+    for discard_cards, histogram in zip(itertools.combinations(cards, 2), histograms):
+        hand = Hand(card_set - discard_cards)
+        crib_score = crib_value(discard_cards, remaining_deck, players_crib)
+        pegging_score = (
+            0.0
+            if pegging_value is None
+            else pegging_value(hand.cards(), remaining_deck, players_crib)
+        )
+        profile = split_profile(histogram, crib_score, pegging_score)
+        discard = Discard(hand, discard_cards, profile.mean, crib_score, pegging_score)
+        results.append((discard, profile))
+    return results
+
+
+def rank_profiles(
+    profiles: List[Tuple[Discard, SplitProfile]], objective: Objective = mean_objective
+) -> List[Tuple[Discard, SplitProfile]]:
+    """Return discard_profiles best first by the objective, ties broken by expected points."""
+    return sorted(profiles, key=lambda p: (objective(p[1]), mean_objective(p[1])), reverse=True)
+
+
 def rank_discards(
-    original_hand: Hand, remaining_deck: List[Card], players_crib: bool = False
+    original_hand: Hand,
+    remaining_deck: List[Card],
+    players_crib: bool = False,
+    crib_value: Optional[Callable[..., float]] = None,
+    pegging_value: Optional[Callable[..., float]] = None,
+    objective: Union[None, str, Objective] = None,
 ) -> List[Discard]:
     """
     Rank the discards in order of preference for the crib
+
+    crib_value(discard, remaining_deck, players_crib) values the crib and defaults to the
+    static discard table, see cards.cribbage.crib.exact_crib_value for the exact one.
+    pegging_value(kept_cards, remaining_deck, players_crib) is the expected pegging
+    differential of the kept cards, see cards.cribbage.pegging_simulator.PeggingValue,
+    and pegging is not valued by default.
+    objective ranks by one of OBJECTIVES, or a function of a SplitProfile, instead of
+    the expected points, which break its ties.
     """
+    if objective is not None:
+        if isinstance(objective, str):
+            objective = OBJECTIVES[objective]
+        profiles = discard_profiles(
+            original_hand, remaining_deck, players_crib, crib_value, pegging_value
+        )
+        return [discard for discard, _ in rank_profiles(profiles, objective)]
+    if crib_value is None:
+        crib_value = table_crib_value
     cards = original_hand.cards()
     assert len(cards) == 6
+    card_set = original_hand.card_set()
     discards: List[Discard] = []
-    for discard_cards in itertools.combinations(cards, 2):
-        hand = Hand(
-            [c for c in cards if c not in discard_cards],
-        )
-        avg_score = sum(score_hand(hand, starter)[0] for starter in remaining_deck) / len(
-            remaining_deck
-        )
+    sums = split_score_sums(cards, remaining_deck)
+    for discard_cards, total in zip(itertools.combinations(cards, 2), sums):
+        hand = Hand(card_set - discard_cards)
         discard = Discard(
             hand,
             discard_cards,
-            avg_score,
-            score_discard(discard_cards, players_crib=players_crib),
+            total / len(remaining_deck),
+            crib_value(discard_cards, remaining_deck, players_crib),
+            (
+                0.0
+                if pegging_value is None
+                else pegging_value(hand.cards(), remaining_deck, players_crib)
+            ),
         )
         discards.append(discard)
-    discards.sort(key=lambda d: d.hand_score + d.crib_score, reverse=True)
+    discards.sort(key=lambda d: d.hand_score + d.crib_score + d.pegging_score, reverse=True)
     return discards
 
 
+def best_discards(
+    original_hand: Hand,
+    remaining_deck: List[Card],
+    k: int = 1,
+    players_crib: bool = False,
+    crib_value: Optional[Callable[..., float]] = None,
+    crib_bound: Optional[Callable[..., float]] = None,
+) -> TopDiscards:
+    """
+    Return the top k discards of rank_discards, in the same order, and how many were pruned.
+
+    Each discard's total is bounded by hand_score_bounds plus crib_bound, an upper bound
+    on crib_value with the same signature. The discard with the best bound is refined
+    first: its hand is averaged over the starters, then its crib is valued, and the
+    search stops once k discards are valued exactly and beat every remaining bound. So
+    pruned discards are never averaged and crib_value is only called for discards that
+    are still in contention with their exact hand score. crib_bound defaults to the
+    crib value itself for the static discard table and to crib_value_bound otherwise.
+    """
+    if crib_value is None:
+        crib_value = table_crib_value
+    if crib_bound is None:
+        crib_bound = table_crib_value if crib_value is table_crib_value else crib_value_bound
+    cards = original_hand.cards()
+    assert len(cards) == 6
+    card_set = original_hand.card_set()
+    scorer = _SplitScorer(cards, remaining_deck)
+    discards = list(itertools.combinations(cards, 2))
+
+    # Entries are (-bound, index, hand score, crib score), with None until valued, so
+    # discards with equal totals come out in combinations order like rank_discards.
+    crib_bounds = [crib_bound(d, remaining_deck, players_crib) for d in discards]
+    heap = [(-scorer.bounds(*SPLITS[i])[1] - crib_bounds[i], i, None, None) for i in range(15)]
+    heapq.heapify(heap)
+    exact_bounds = crib_bound is crib_value
+    found: List[Discard] = []
+    averaged = 0
+    while heap and len(found) < k:
+        _, index, hand_score, crib = heapq.heappop(heap)
+        discard_cards = discards[index]
+        if crib is not None:
+            found.append(Discard(Hand(card_set - discard_cards), discard_cards, hand_score, crib))
+            continue
+        if hand_score is None:
+            hand_score = scorer.sum(*SPLITS[index]) / len(remaining_deck)
+            averaged += 1
+            if not exact_bounds:
+                bound = hand_score + crib_bounds[index]
+                heapq.heappush(heap, (-bound, index, hand_score, None))
+                continue
+            crib = crib_bounds[index]
+        else:
+            crib = crib_value(discard_cards, remaining_deck, players_crib)
+        heapq.heappush(heap, (-(hand_score + crib), index, hand_score, crib))
+    return TopDiscards(found, len(discards) - averaged)
+
+
+def iter_rank_discards(
+    original_hand: Hand,
+    remaining_deck: List[Card],
+    players_crib: bool = False,
+    crib_value: Optional[Callable[..., float]] = None,
+    deadline_ms: Optional[float] = None,
+) -> Iterator[AnytimeRanking]:
+    """
+    Yield the ranking of the discards each time it is refined.
+
+    The first ranking values every crib with the static discard table. Each refinement
+    values one more crib with crib_value, the most promising discard first, and the
+    ranking with every crib valued is flagged exact; it is the ranking rank_discards
+    returns. With deadline_ms no refinement is started once that many milliseconds have
+    passed since the first ranking was asked for, so one slow refinement can overrun it.
+    """
+    start = time.perf_counter()
+    cards = original_hand.cards()
+    assert len(cards) == 6
+    card_set = original_hand.card_set()
+    sums = split_score_sums(cards, remaining_deck)
+    discards = [
+        Discard(
+            Hand(card_set - discard_cards),
+            discard_cards,
+            total / len(remaining_deck),
+            table_crib_value(discard_cards, remaining_deck, players_crib),
+        )
+        for discard_cards, total in zip(itertools.combinations(cards, 2), sums)
+    ]
+
+    def ranking(exact: bool) -> AnytimeRanking:
+        return AnytimeRanking(
+            sorted(discards, key=lambda d: d.hand_score + d.crib_score, reverse=True), exact
+        )
+
+    if crib_value is None or crib_value is table_crib_value:
+        yield ranking(True)
+        return
+    yield ranking(False)
+    order = sorted(
+        range(len(discards)), key=lambda i: discards[i].hand_score + discards[i].crib_score
+    )
+    while order:
+        if deadline_ms is not None and (time.perf_counter() - start) * 1000 >= deadline_ms:
+            return
+        i = order.pop()
+        discards[i] = discards[i]._replace(
+            crib_score=crib_value(discards[i].discard, remaining_deck, players_crib)
+        )
+        yield ranking(not order)
+
+
+def rank_discards_within(
+    original_hand: Hand,
+    remaining_deck: List[Card],
+    players_crib: bool = False,
+    crib_value: Optional[Callable[..., float]] = None,
+    deadline_ms: Optional[float] = None,
+) -> AnytimeRanking:
+    """Return the most refined ranking iter_rank_discards reaches by the deadline."""
+    result = None
+    for result in iter_rank_discards(
+        original_hand, remaining_deck, players_crib, crib_value, deadline_ms
+    ):
+        pass
+    return result
+
+
 def parse_discard(response, hand):
     """Given a string, return a list of cards that the string represents of the options provided."""
     try:
@@ -108,11 +522,11 @@ def parse_discard(response, hand):
     return True, discards
 
 
-def main():
+def main(deal_engine: Optional[DealEngine] = None):
     """Play a game of choosing discards."""
     players_crib = True
     while True:
-        deck = shuffled([Card(s, n) for s in Suit for n in range(1, 14)])
+        deck = shuffled([Card(s, n) for s in Suit for n in range(1, 14)], deal_engine)
         player_hand = Hand(deck[0:6])
         players_crib = not players_crib
         print(f"Your hand: {player_hand.display()}")
@@ -124,16 +538,24 @@ def main():
             success, discard_guess = parse_discard(guess_str, player_hand)
             if success:
                 break
-        ranked_discards = rank_discards(player_hand, deck[6:], players_crib=players_crib)
-        if players_crib:
-            print("        Hand               Discard  (hand   crib   total)")
-        else:
-            print("        Hand               Discard  (hand    crib   total)")
-        for i, d in enumerate(ranked_discards):
+        profiles = discard_profiles(player_hand, rest_of_deck(player_hand.cards()), players_crib)
+        crib_padding = "  " if players_crib else "   "
+        print(
+            f"        Hand               Discard  (hand {crib_padding}crib   total)"
+            "   floor  P(12+)  mean-var"
+        )
+        for i, (d, profile) in enumerate(rank_profiles(profiles)):
+            objectives = (
+                f"  {OBJECTIVES['floor'](profile):6.2f}  {OBJECTIVES['hail_mary'](profile):6.1%}"
+                f"  {OBJECTIVES['mean_variance'](profile):8.2f}"
+            )
             if discard_guess[0] in d.discard and discard_guess[1] in d.discard:
-                print(colored("->", "yellow"), f"{str(i+1).rjust(2)}:  {display_discard(d)}")
+                print(
+                    colored("->", "yellow"),
+                    f"{str(i+1).rjust(2)}:  {display_discard(d)}{objectives}",
+                )
             else:
-                print(f"{str(i+1).rjust(5)}:  {display_discard(d)}")
+                print(f"{str(i+1).rjust(5)}:  {display_discard(d)}{objectives}")
         print()
 
 
@@ -2,20 +2,21 @@
 A hand of cards in cribbage.
 """
 
-from typing import List
-from cards.cards.card import Card
+from typing import List, Union
+from cards.cards.card import Card, CardSet
 
 
 class Hand:
     """A hand of cards in cribbage."""
 
-    def __init__(self, cards: List[Card], is_crib: bool = False):
-        self.__cards = cards
+    def __init__(self, cards: Union[List[Card], CardSet], is_crib: bool = False):
+        self.__card_set = cards if isinstance(cards, CardSet) else CardSet(cards)
         self.__sort()
         self.is_crib = is_crib
 
     def __sort(self):
-        self.__cards = sorted(self.__cards, key=lambda c: (c.number(), c.suit().value))
+        # Card ids are in (number, suit) order, so iterating the set sorts the hand.
+        self.__cards = list(self.__card_set)
 
     def __repr__(self) -> str:
         return f"Hand({self.__cards}, is_crib={self.is_crib})"
@@ -24,6 +25,10 @@ class Hand:
         """Return a list of the cards in the hand."""
         return self.__cards
 
+    def card_set(self) -> CardSet:
+        """Return the cards in the hand as a CardSet."""
+        return self.__card_set
+
     def display(self, show=True) -> str:
         """Return a string representation of the hand for display."""
         if show:
@@ -32,12 +37,13 @@ class Hand:
 
     def discard(self, card) -> Card:
         """Discard a card from the hand and return the card."""
-        if card not in self.__cards:
+        if card not in self.__card_set:
             raise ValueError(f"Card {card} not in hand {self}")
-        del self.__cards[self.__cards.index(card)]
+        self.__card_set = self.__card_set.remove(card)
+        self.__sort()
         return card
 
     def add(self, card: Card) -> None:
         """Add a card to the hand."""
-        self.__cards.append(card)
+        self.__card_set = self.__card_set.add(card)
         self.__sort()
@@ -9,6 +9,7 @@ from typing import List, Dict, Tuple, Union, Optional
 
 from cards.cribbage.discards import which_cards_do_i_mean
 from cards.cards.card import DECK, shuffled, Card
+from cards.cards.deal import DealEngine
 from cards.cribbage.players import Player
 from cards.cribbage.hand import Hand
 from cards.cribbage.scoring import card_value
@@ -35,18 +36,72 @@ def parse_pegging(response: str, hand: Hand):
 PlayedCard = namedtuple("PlayedCard", ["player", "card"])
 PeggingScore = namedtuple("PeggingScore", ["fifteen", "thirtyone", "go", "pair", "run", "total"])
 
+# PAIR_POINTS[n] is the score for a card matching the last n cards played.
+PAIR_POINTS = (0, 2, 6, 12)
+
+
+def is_run(mask: int) -> bool:
+    """Return whether the set bits of a nonzero mask are contiguous."""
+    return (mask + (mask & -mask)) & mask == 0
+
+
+def score_number(
+    count: int, run_mask: int, run_length: int, last_number: int, repeats: int, number: int
+) -> Tuple[int, int, int, int, bool]:
+    """
+    Score playing a card of the number.
+
+    count is the count with the card played. The run in play is a bitmask of its numbers
+    and its length, and last_number is the number of the last card played, repeats times
+    in a row. Returns the fifteen, thirty one, pair and run points and whether the card
+    extends the run.
+    """
+    fifteen = 2 if count == 15 else 0
+    thirtyone = 2 if count == 31 else 0
+    pair = PAIR_POINTS[min(repeats, 3)] if number == last_number else 0
+    # A run with a repeated number has fewer bits than cards and can never be extended.
+    bit = 1 << number
+    extends = (
+        run_length > 0
+        and run_mask.bit_count() == run_length
+        and not run_mask & bit
+        and is_run(run_mask | bit)
+    )
+    run = run_length + 1 if extends and run_length >= 2 else 0
+    return fifteen, thirtyone, pair, run, extends
+
+
+def next_run(
+    run_mask: int, run_length: int, last_number: int, number: int, extends: bool
+) -> Tuple[int, int]:
+    """Return the run in play after a card of the number is played, see score_number."""
+    if extends:
+        return run_mask | 1 << number, run_length + 1
+    if last_number:
+        # The run starts over from the last two cards played.
+        return 1 << last_number | 1 << number, 2
+    return 1 << number, 1
+
 
 class CardsInPlay:
     """
     The cards in play during pegging.
+
+    The run in play is kept as a bitmask of its numbers and its length, and pairs as the
+    number of the last card played and how many cards in a row had that number, so
+    scoring a play takes constant time.
     """
 
     def __init__(self) -> None:
         self.__played_cards: List[PlayedCard] = []
         self.__current_count: int = 0
         self.__points: Dict[Player, int] = {Player.PLAYER1: 0, Player.PLAYER2: 0}
-        self.__current_run: List[PlayedCard] = []
+        self.__run_mask: int = 0
+        self.__run_length: int = 0
+        self.__last_number: int = 0
+        self.__last_number_count: int = 0
         self.__current_gos: Dict[Player, bool] = {Player.PLAYER1: False, Player.PLAYER2: False}
+        self.__undo: List[Tuple] = []
 
     def count(self) -> int:
         """Return the current play count."""
@@ -61,12 +116,16 @@ class CardsInPlay:
         valid_play, extend_run, score = self.score_play(PlayedCard(player, card))
         if not valid_play:
             raise ValueError("Cannot play card that would exceed 31")
-        played_card = PlayedCard(player, card)
-        self.__played_cards.append(played_card)
-        if extend_run:
-            self.__current_run.append(played_card)
+        self.__played_cards.append(PlayedCard(player, card))
+        number = card.number()
+        self.__run_mask, self.__run_length = next_run(
+            self.__run_mask, self.__run_length, self.__last_number, number, extend_run
+        )
+        if number == self.__last_number:
+            self.__last_number_count += 1
         else:
-            self.__current_run = self.__played_cards[-2:]
+            self.__last_number = number
+            self.__last_number_count = 1
         self.__current_count += card_value(card)
         self.__points[player] += score.total
         opponent = Player.PLAYER1 if player == Player.PLAYER2 else Player.PLAYER2
@@ -74,7 +133,8 @@ class CardsInPlay:
             self.__current_gos[player] = False
             self.__current_gos[opponent] = False
             self.__current_count = 0
-            self.__current_run = []
+            self.__run_mask = 0
+            self.__run_length = 0
         return {player: score, opponent: PeggingScore(0, 0, 0, 0, 0, 0)}
 
     def go(self, player: Player) -> Dict[Player, PeggingScore]:
@@ -84,7 +144,8 @@ class CardsInPlay:
             self.__current_gos[player] = False
             self.__current_gos[opponent] = False
             self.__current_count = 0
-            self.__current_run = []
+            self.__run_mask = 0
+            self.__run_length = 0
             return {
                 player: PeggingScore(0, 0, 0, 0, 0, 0),
                 opponent: PeggingScore(0, 0, 0, 0, 0, 0),
@@ -101,6 +162,44 @@ class CardsInPlay:
             opponent: PeggingScore(0, 0, 0, 0, 0, 0),
         }
 
+    def push(self, player: Player, card: Optional[Card] = None) -> Dict[Player, PeggingScore]:
+        """
+        Play a card, or say go if card is None, so that it can be undone with pop.
+
+        Returns the points scored by each player like play and go.
+        """
+        state = (
+            card is not None,
+            self.__current_count,
+            self.__run_mask,
+            self.__run_length,
+            self.__last_number,
+            self.__last_number_count,
+            self.__current_gos[Player.PLAYER1],
+            self.__current_gos[Player.PLAYER2],
+            self.__points[Player.PLAYER1],
+            self.__points[Player.PLAYER2],
+        )
+        points = self.go(player) if card is None else self.play(player, card)
+        self.__undo.append(state)
+        return points
+
+    def pop(self) -> Optional[PlayedCard]:
+        """Undo the last push and return the card it played, or None for a go."""
+        (
+            played,
+            self.__current_count,
+            self.__run_mask,
+            self.__run_length,
+            self.__last_number,
+            self.__last_number_count,
+            self.__current_gos[Player.PLAYER1],
+            self.__current_gos[Player.PLAYER2],
+            self.__points[Player.PLAYER1],
+            self.__points[Player.PLAYER2],
+        ) = self.__undo.pop()
+        return self.__played_cards.pop() if played else None
+
     def return_cards(self, player: Player) -> List[Card]:
         """Return the cards played by a player."""
         return [
@@ -113,59 +212,27 @@ class CardsInPlay:
 
         Returns a tuple of (valid_play, extend_run, score)
         """
-        points = {"fifteen": 0, "thirtyone": 0, "go": 0, "pair": 0, "run": 0}
-        extend_run = False
         new_count = self.__current_count + card_value(played_card.card)
         if new_count > 31:
             return False, False, PeggingScore(0, 0, 0, 0, 0, 0)
-        # Fifteen
-        if new_count == 15:
-            points["fifteen"] += 2
-        # Thirty-one
-        if new_count == 31:
-            points["thirtyone"] += 2
-        # Pair
-        if (
-            len(self.__played_cards) > 0
-            and self.__played_cards[-1].card.number() == played_card.card.number()
-        ):
-            if (
-                len(self.__played_cards) > 1
-                and self.__played_cards[-2].card.number() == played_card.card.number()
-            ):
-                if (
-                    len(self.__played_cards) > 2
-                    and self.__played_cards[-3].card.number() == played_card.card.number()
-                ):
-                    points["pair"] += 6
-                points["pair"] += 4
-            points["pair"] += 2
-        # Run
-        if len(self.__current_run) == 0:
-            extend_run = False
-        else:
-            proposed_run = self.__current_run + [played_card]
-            proposed_run = sorted(proposed_run, key=lambda pc: pc.card.number())
-            gaps = [
-                proposed_run[i].card.number() - proposed_run[i - 1].card.number()
-                for i in range(1, len(proposed_run))
-            ]
-            if all((gap == 1 for gap in gaps)):
-                if len(proposed_run) >= 3:
-                    points["run"] += len(proposed_run)
-                extend_run = True
-            else:
-                extend_run = False
+        fifteen, thirtyone, pair, run, extend_run = score_number(
+            new_count,
+            self.__run_mask,
+            self.__run_length,
+            self.__last_number,
+            self.__last_number_count,
+            played_card.card.number(),
+        )
         return (
             True,
             extend_run,
             PeggingScore(
-                fifteen=points["fifteen"],
-                thirtyone=points["thirtyone"],
-                go=points["go"],
-                pair=points["pair"],
-                run=points["run"],
-                total=sum(points.values()),
+                fifteen=fifteen,
+                thirtyone=thirtyone,
+                go=0,
+                pair=pair,
+                run=run,
+                total=fifteen + thirtyone + pair + run,
             ),
         )
 
@@ -293,15 +360,16 @@ def print_current_game(player_hand, opponent_hand, cip, turn):
     print(player_hand.display())
 
 
-def main():
+def main(deal_engine: Optional[DealEngine] = None):
     """Play a game of pegging."""
 
+    rng = random if deal_engine is None else deal_engine
     while True:
-        deck = shuffled(DECK)
+        deck = shuffled(DECK, deal_engine)
         player_hand = Hand(deck[0:4])
         opponent_hand = Hand(deck[4:8])
         cip = CardsInPlay()
-        turn = random.choice([Player.PLAYER1, Player.PLAYER2])
+        turn = rng.choice([Player.PLAYER1, Player.PLAYER2])
         print("New game of pegging!")
         while len(player_hand.cards()) > 0 or len(opponent_hand.cards()) > 0:
             if turn == Player.PLAYER1:
@@ -0,0 +1,191 @@
+"""
+A headless pegging simulator for rollouts.
+
+Pegging only depends on the numbers of the cards, so hands are lists of numbers and the
+state of play is a handful of ints, scored by the same score_number as CardsInPlay. The
+run in play is a bitmask of numbers: a card extends it if its number is not in the mask
+and the mask with it is one block of set bits.
+"""
+
+import random
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from cards.cards.card import Card, CardSet
+from cards.cards.deal import DealEngine, game_seed
+from cards.cribbage.pegging import next_run, score_number
+
+# VALUES[n] is the count value of a card of number n.
+VALUES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
+
+
+class PeggingState:
+    """
+    The state of play between two players, 0 and 1.
+
+    last is the number of the last card played and repeats how many cards in a row had
+    that number, 0 if there is none. Like CardsInPlay they carry over when the count resets.
+    """
+
+    __slots__ = ("count", "points", "gos", "last", "repeats", "run_mask", "run_length")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.points = [0, 0]
+        self.gos = [False, False]
+        self.last = self.repeats = 0
+        self.run_mask = 0
+        self.run_length = 0
+
+    def can_play(self, number: int) -> bool:
+        """Return whether a card of the number can be played without passing 31."""
+        return self.count + VALUES[number] <= 31
+
+    def score(self, number: int) -> int:
+        """Return the points for playing a card of the number."""
+        fifteen, thirtyone, pair, run, _ = score_number(
+            self.count + VALUES[number],
+            self.run_mask,
+            self.run_length,
+            self.last,
+            self.repeats,
+            number,
+        )
+        return fifteen + thirtyone + pair + run
+
+    def play(self, player: int, number: int) -> int:
+        """Play a card of the number and return the points scored."""
+        self.count += VALUES[number]
+        fifteen, thirtyone, pair, run, extends = score_number(
+            self.count, self.run_mask, self.run_length, self.last, self.repeats, number
+        )
+        points = fifteen + thirtyone + pair + run
+        self.run_mask, self.run_length = next_run(
+            self.run_mask, self.run_length, self.last, number, extends
+        )
+        self.repeats = self.repeats + 1 if number == self.last else 1
+        self.last = number
+        self.points[player] += points
+        if self.count == 31:
+            self.gos[0] = self.gos[1] = False
+            self.count = 0
+            self.run_mask = self.run_length = 0
+        return points
+
+    def go(self, player: int) -> int:
+        """Say go and return the points scored by the other player."""
+        opponent = 1 - player
+        if self.gos[opponent]:
+            self.gos[0] = self.gos[1] = False
+            self.count = 0
+            self.run_mask = self.run_length = 0
+            return 0
+        if not self.gos[player]:
+            self.gos[player] = True
+            self.points[opponent] += 1
+            return 1
+        return 0
+
+
+# A pegging policy picks a number to play from the playable numbers, in increasing order.
+PeggingPolicy = Callable[[PeggingState, List[int], random.Random], int]
+
+
+def greedy_policy(state: PeggingState, playable: List[int], rng: random.Random) -> int:
+    """Play the card that scores the most, the lowest on ties, like play_ai."""
+    del rng
+    best = playable[0]
+    best_points = state.score(best)
+    for number in playable[1:]:
+        points = state.score(number)
+        if points > best_points:
+            best, best_points = number, points
+    return best
+
+
+def random_policy(state: PeggingState, playable: List[int], rng: random.Random) -> int:
+    """Play a random playable card."""
+    del state
+    return rng.choice(playable)
+
+
+PEGGING_POLICIES: Dict[str, PeggingPolicy] = {
+    "greedy": greedy_policy,
+    "random": random_policy,
+}
+
+
+def simulate_pegging(
+    hands: Tuple[Sequence[int], Sequence[int]],
+    leader: int,
+    policies: Tuple[PeggingPolicy, PeggingPolicy] = (greedy_policy, greedy_policy),
+    rng: Optional[random.Random] = None,
+) -> Tuple[int, int]:
+    """
+    Peg out two hands of numbers and return the points of each player.
+
+    Players take turns starting with the leader, playing when they can and saying go
+    when they cannot, until both hands are empty.
+    """
+    if rng is None:
+        rng = random.Random()
+    state = PeggingState()
+    remaining = [sorted(hands[0]), sorted(hands[1])]
+    turn = leader
+    while remaining[0] or remaining[1]:
+        hand = remaining[turn]
+        playable = [n for n in hand if state.count + VALUES[n] <= 31]
+        if playable:
+            number = policies[turn](state, playable, rng)
+            hand.remove(number)
+            state.play(turn, number)
+        else:
+            state.go(turn)
+        turn = 1 - turn
+    return state.points[0], state.points[1]
+
+
+class PeggingValue:
+    """
+    The expected pegging differential of a kept hand against sampled opponent hands.
+
+    The opponent's four cards are sampled from the remaining deck, and the pone leads.
+    Samples depend only on the seed and the remaining deck, so the kept hands of one
+    decision are compared on the same opponent hands. An instance can be passed as the
+    pegging_value of rank_discards.
+    """
+
+    def __init__(
+        self, samples: int = 200, policy: str = "greedy", opponent_policy: str = "greedy", seed=0
+    ):
+        self.__samples = samples
+        self.__policies = (PEGGING_POLICIES[policy], PEGGING_POLICIES[opponent_policy])
+        self.__seed = seed
+        self.__key: Optional[int] = None
+        self.__opponents: List[Tuple[int, List[int]]] = []
+        self.__rng = random.Random()
+
+    def __call__(
+        self, kept: Sequence[Card], remaining_deck: Sequence[Card], players_crib: bool = False
+    ) -> float:
+        numbers = [c.number() for c in kept]
+        leader = 1 if players_crib else 0
+        total = 0
+        for seed, opponent in self.__sample(remaining_deck):
+            self.__rng.seed(seed)
+            ours, theirs = simulate_pegging(
+                (numbers, opponent), leader, self.__policies, self.__rng
+            )
+            total += ours - theirs
+        return total / self.__samples
+
+    def __sample(self, remaining_deck: Sequence[Card]) -> List[Tuple[int, List[int]]]:
+        mask = CardSet(remaining_deck).mask()
+        if mask != self.__key:
+            rng = DealEngine(game_seed(self.__seed, mask)).rng()
+            cards = list(remaining_deck)
+            self.__opponents = [
+                (rng.getrandbits(64), [c.number() for c in rng.sample(cards, 4)])
+                for _ in range(self.__samples)
+            ]
+            self.__key = mask
+        return self.__opponents
@@ -0,0 +1,194 @@
+"""
+Solve pegging exactly when both hands are known.
+
+Both players play to maximize their own points less their opponent's, and a player who
+can play must. Suits never matter in pegging, so states only hold numbers: the numbers
+left in each hand, the count, the run in play as a bitmask and length, the last number
+played and how many times in a row, and the go flags. States are searched with
+alpha-beta and stored in a transposition table from the point of view of the player to
+move, so the same position reached by either player is solved once.
+"""
+
+import random
+import argparse
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from cards.cards.card import Card, CARDS
+from cards.cards.deal import DealEngine
+from cards.cribbage.pegging import next_run, score_number
+from cards.cribbage.pegging_simulator import VALUES, simulate_pegging
+
+PeggingSolution = namedtuple("PeggingSolution", "differential line")
+
+# A state is (hand to move, other hand, count, run mask, run length, last number,
+# last number repeats, go said by the player to move, go said by the other player).
+State = Tuple[Tuple[int, ...], Tuple[int, ...], int, int, int, int, int, bool, bool]
+# A move is a number to play, or None to say go.
+Move = Optional[int]
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+_INFINITY = 1000
+
+
+def _numbers(hand: Sequence[Union[Card, int]]) -> Tuple[int, ...]:
+    return tuple(sorted(c if isinstance(c, int) else c.number() for c in hand))
+
+
+def _moves(state: State) -> List[Tuple[int, Move, State]]:
+    """Return (points, move, next state) for each move, the best scoring first."""
+    hand, other, count, run_mask, run_length, last, repeats, go, other_go = state
+    moves = []
+    for i, number in enumerate(hand):
+        if (i > 0 and hand[i - 1] == number) or count + VALUES[number] > 31:
+            continue
+        new_count = count + VALUES[number]
+        fifteen, thirtyone, pair, run, extends = score_number(
+            new_count, run_mask, run_length, last, repeats, number
+        )
+        points = fifteen + thirtyone + pair + run
+        new_mask, new_length = next_run(run_mask, run_length, last, number, extends)
+        new_repeats = min(repeats + 1, 3) if number == last else 1
+        new_go, new_other_go = go, other_go
+        if new_count == 31:
+            new_count = new_mask = new_length = 0
+            new_go = new_other_go = False
+        rest = hand[:i] + hand[i + 1 :]
+        child = (
+            other,
+            rest,
+            new_count,
+            new_mask,
+            new_length,
+            number,
+            new_repeats,
+            new_other_go,
+            new_go,
+        )
+        moves.append((points, number, child))
+    if moves:
+        moves.sort(key=lambda m: m[0], reverse=True)
+        return moves
+    if other_go:
+        child = (other, hand, 0, 0, 0, last, repeats, False, False)
+        return [(0, None, child)]
+    if not go:
+        child = (other, hand, count, run_mask, run_length, last, repeats, other_go, True)
+        return [(-1, None, child)]
+    child = (other, hand, count, run_mask, run_length, last, repeats, other_go, go)
+    return [(0, None, child)]
+
+
+class PeggingSolver:
+    """
+    An exact pegging solver whose transposition table is kept between solves.
+
+    The table is emptied before a solve once it holds more than max_table_size states.
+    """
+
+    def __init__(self, max_table_size: int = 1_000_000) -> None:
+        self.__table: Dict[State, Tuple[int, int]] = {}
+        self.__max_table_size = max_table_size
+        self.nodes = 0
+
+    def table_size(self) -> int:
+        """Return the number of states in the transposition table."""
+        return len(self.__table)
+
+    def solve(
+        self,
+        hands: Tuple[Sequence[Union[Card, int]], Sequence[Union[Card, int]]],
+        leader: int = 0,
+        count: int = 0,
+    ) -> PeggingSolution:
+        """
+        Return the best differential for player 0 and the line of play that reaches it.
+
+        hands are cards or numbers, leader is the player to play first and count is the
+        count before they do. The line is a list of (player, number), with None for a go.
+        """
+        if len(self.__table) > self.__max_table_size:
+            self.__table.clear()
+        hands = (_numbers(hands[0]), _numbers(hands[1]))
+        state: State = (hands[leader], hands[1 - leader], count, 0, 0, 0, 0, False, False)
+        value = self.value(state)
+        line = []
+        player = leader
+        while state[0] or state[1]:
+            target = self.value(state)
+            for points, move, child in _moves(state):
+                if points - self.value(child) == target:
+                    line.append((player, move))
+                    state = child
+                    break
+            player = 1 - player
+        return PeggingSolution(value if leader == 0 else -value, line)
+
+    def value(self, state: State) -> int:
+        """Return the best differential for the player to move in a state."""
+        return self.__search(state, -_INFINITY, _INFINITY)
+
+    def __search(self, state: State, alpha: int, beta: int) -> int:
+        if not state[0] and not state[1]:
+            return 0
+        self.nodes += 1
+        entry = self.__table.get(state)
+        if entry is not None:
+            value, bound = entry
+            if (
+                bound == _EXACT
+                or (bound == _LOWER and value >= beta)
+                or (bound == _UPPER and value <= alpha)
+            ):
+                return value
+        original_alpha = alpha
+        best = -_INFINITY
+        for points, _, child in _moves(state):
+            value = points - self.__search(child, points - beta, points - alpha)
+            if value > best:
+                best = value
+                alpha = max(alpha, best)
+                if alpha >= beta:
+                    break
+        if best <= original_alpha:
+            bound = _UPPER
+        elif best >= beta:
+            bound = _LOWER
+        else:
+            bound = _EXACT
+        self.__table[state] = (best, bound)
+        return best
+
+
+def solve_pegging(
+    hands: Tuple[Sequence[Union[Card, int]], Sequence[Union[Card, int]]],
+    leader: int = 0,
+    count: int = 0,
+) -> PeggingSolution:
+    """Solve one deal of pegging, see PeggingSolver.solve."""
+    return PeggingSolver().solve(hands, leader, count)
+
+
+def main():
+    """Compare greedy pegging with perfect play on random deals."""
+    parser = argparse.ArgumentParser(description="Compare greedy pegging with perfect play.")
+    parser.add_argument("--deals", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    engine = DealEngine(args.seed)
+    solver = PeggingSolver()
+    greedy_total = 0
+    perfect_total = 0
+    for _ in range(args.deals):
+        deck = engine.shuffled(CARDS)
+        hands = ([c.number() for c in deck[:4]], [c.number() for c in deck[4:8]])
+        ours, theirs = simulate_pegging(hands, 1, rng=random.Random(0))
+        greedy_total += ours - theirs
+        perfect_total += solver.solve(hands, leader=1).differential
+    print(f"Dealer's mean differential with greedy play: {greedy_total / args.deals:.3f}")
+    print(f"Dealer's mean differential with perfect play: {perfect_total / args.deals:.3f}")
+    print(f"{solver.nodes} nodes searched, {solver.table_size()} states stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+A precomputed, memory-mapped table of every cribbage hand and starter score.
+
+The table holds one byte per 4 card hand, starter and flush rule:
+2 x C(52, 4) x 48 = 25,989,600 bytes. Hands are indexed with the combinatorial number
+system and starters by their position among the 48 cards not in the hand. Worker
+processes that open the same file share its pages through the OS page cache.
+"""
+
+import os
+import mmap
+import argparse
+from math import comb
+from typing import Optional
+
+from cards.cards.card import Card
+from cards.cribbage.hand import Hand
+from cards.cribbage.scoring import np, score_hand_total, score_hands_batch, PartialHand
+
+MAGIC = b"CRIBTBL1"
+HANDS = comb(52, 4)
+STARTERS = 48
+VARIANT_SIZE = HANDS * STARTERS
+TABLE_SIZE = len(MAGIC) + 2 * VARIANT_SIZE
+
+DEFAULT_PATH = os.environ.get(
+    "CARDS_SCORE_TABLE", os.path.join(os.path.dirname(__file__), "data", "score_table.bin")
+)
+
+_BINOMIALS = [[comb(n, k) for n in range(53)] for k in range(5)]
+
+
+def hand_index(ids) -> int:
+    """Return the combinatorial index of 4 card ids given in increasing order."""
+    a, b, c, d = ids
+    return _BINOMIALS[1][a] + _BINOMIALS[2][b] + _BINOMIALS[3][c] + _BINOMIALS[4][d]
+
+
+def hand_ids(index: int):
+    """Return the 4 card ids, in increasing order, of the hand with the given index."""
+    ids = []
+    for k in range(4, 0, -1):
+        n = k - 1
+        while _BINOMIALS[k][n + 1] <= index:
+            n += 1
+        ids.append(n)
+        index -= _BINOMIALS[k][n]
+    return tuple(reversed(ids))
+
+
+def starter_index(ids, starter_id: int) -> int:
+    """Return the position of the starter among the 48 cards not in the hand."""
+    return starter_id - sum(1 for i in ids if i < starter_id)
+
+
+def table_offset(ids, starter_id: int, is_crib: bool) -> int:
+    """Return the offset of a hand and starter in the table data."""
+    return (
+        (VARIANT_SIZE if is_crib else 0)
+        + hand_index(ids) * STARTERS
+        + starter_index(ids, starter_id)
+    )
+
+
+def _hands_in_index_order():
+    """Yield the 4 card id tuples in increasing hand index order (colexicographic)."""
+    for d in range(3, 52):
+        for c in range(2, d):
+            for b in range(1, c):
+                for a in range(b):
+                    yield a, b, c, d
+
+
+def _build_variant_numpy(is_crib: bool, chunk: int = 8192) -> bytes:
+    """Score every hand and starter for one flush rule with the batch scorer."""
+    hands = np.array(list(_hands_in_index_order()), dtype=np.int16)
+    in_hand = np.zeros((HANDS, 52), dtype=bool)
+    in_hand[np.arange(HANDS)[:, None], hands] = True
+    starters = np.nonzero(~in_hand)[1].reshape(HANDS, STARTERS).astype(np.int16)
+    scores = np.empty((HANDS, STARTERS), dtype=np.uint8)
+    for start in range(0, HANDS, chunk):
+        stop = start + chunk
+        scores[start:stop] = score_hands_batch(hands[start:stop], starters[start:stop], is_crib)
+    return scores.tobytes()
+
+
+def _build_variant_python(is_crib: bool) -> bytes:
+    """Score every hand and starter for one flush rule in pure Python."""
+    data = bytearray(VARIANT_SIZE)
+    offset = 0
+    for ids in _hands_in_index_order():
+        partial = PartialHand(Hand([Card.from_id(i) for i in ids], is_crib=is_crib))
+        for starter_id in range(52):
+            if starter_id not in ids:
+                data[offset] = partial.score(Card.from_id(starter_id))
+                offset += 1
+    return bytes(data)
+
+
+def build_score_table(path: str = DEFAULT_PATH) -> None:
+    """Compute every score and write the table to path."""
+    build_variant = _build_variant_python if np is None else _build_variant_numpy
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(build_variant(is_crib=False))
+        f.write(build_variant(is_crib=True))
+    os.replace(temporary_path, path)
+
+
+class ScoreTable:
+    """A read-only, memory-mapped score table."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(path, "rb") as f:
+            self.__data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.__data) != TABLE_SIZE or self.__data[: len(MAGIC)] != MAGIC:
+            self.__data.close()
+            raise ValueError(f"{path} is not a cribbage score table")
+
+    def score(self, hand: Hand, starter: Card) -> int:
+        """Return the score of a 4 card hand with the starter."""
+        ids = [c.id() for c in hand.cards()]
+        return self.__data[len(MAGIC) + table_offset(ids, starter.id(), hand.is_crib)]
+
+    def close(self) -> None:
+        """Unmap the table."""
+        self.__data.close()
+
+
+_default_table: Optional[ScoreTable] = None
+_default_table_loaded = False
+
+
+def default_table() -> Optional[ScoreTable]:
+    """Return the table at the default path, or None if it has not been built."""
+    global _default_table, _default_table_loaded  # pylint: disable=global-statement
+    if not _default_table_loaded:
+        _default_table_loaded = True
+        if os.path.exists(DEFAULT_PATH):
+            _default_table = ScoreTable(DEFAULT_PATH)
+    return _default_table
+
+
+def score_hand_lookup(hand: Hand, starter: Card) -> int:
+    """Return the same total as score_hand, from the table if it exists."""
+    table = default_table()
+    if table is None or len(hand.cards()) != 4:
+        return score_hand_total(hand, starter)
+    return table.score(hand, starter)
+
+
+def main():
+    """Build the score table."""
+    parser = argparse.ArgumentParser(description="Build the cribbage score table.")
+    parser.add_argument("--output", default=DEFAULT_PATH, help="where to write the table")
+    args = parser.parse_args()
+    build_score_table(args.output)
+    print(f"Wrote {TABLE_SIZE} bytes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
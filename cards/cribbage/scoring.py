@@ -3,11 +3,18 @@ Functions to score cribbage hands.
 """
 
 import math
+import functools
 import itertools
-from collections import namedtuple
-from typing import List, Tuple, Union, Dict
+from collections import Counter, namedtuple
+from typing import Iterable, List, Optional, Tuple, Union, Dict
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for batch scoring
+    np = None
 
 from cards.cards.card import Card, Suit, JACK, shuffled
+from cards.cards.deal import DealEngine
 from cards.cribbage.hand import Hand
 
 Score = namedtuple("Score", "total cards")
@@ -34,6 +41,45 @@ def score_hand_fifteens(hand: Hand, starter: Card) -> Score:
     return Score(total=2 * len(fifteens), cards=fifteens)
 
 
+class FifteenCounter:
+    """
+    Counts fifteens with a subset-sum table over card values.
+
+    ways[s] is the number of subsets of the values that sum to s, for s up to 15. No
+    single card is worth 15, so ways[15] is the number of fifteens.
+    """
+
+    __slots__ = ("__ways",)
+
+    def __init__(self, values=(), ways=None):
+        if ways is None:
+            ways = [1] + [0] * 15
+            for value in values:
+                for total in range(15, value - 1, -1):
+                    ways[total] += ways[total - value]
+        self.__ways = ways
+
+    def add(self, value: int) -> "FifteenCounter":
+        """Return a new counter with one more card value."""
+        ways = list(self.__ways)
+        for total in range(15, value - 1, -1):
+            ways[total] += ways[total - value]
+        return FifteenCounter(ways=ways)
+
+    def fifteens(self) -> int:
+        """Return the number of fifteens."""
+        return self.__ways[15]
+
+    def fifteens_with(self, value: int) -> int:
+        """Return the number of fifteens if a card of the given value were added."""
+        return self.__ways[15] + self.__ways[15 - value]
+
+
+def count_fifteens(values) -> int:
+    """Return the number of subsets of the card values that sum to 15."""
+    return FifteenCounter(values).fifteens()
+
+
 def is_pair(cards: Union[List[Card], Tuple[Card, Card]]) -> bool:
     """Return True if the two cards are a pair."""
     return len(cards) == 2 and cards[0].number() == cards[1].number()
@@ -99,8 +145,15 @@ def score_hand_runs(hand: Hand, starter: Card) -> Score:
 HandScore = namedtuple("HandScore", "fifteens pairs runs flush his_nobs")
 
 
-def score_hand(hand: Hand, starter: Card) -> Tuple[int, HandScore]:
-    """Score a cribbage hand."""
+def score_hand(hand: Hand, starter: Card, explain: bool = True) -> Tuple[int, Optional[HandScore]]:
+    """
+    Score a cribbage hand.
+
+    Returns the total and the explanation of the score, or None for the explanation if
+    explain is False, in which case this is the same as score_hand_total.
+    """
+    if not explain:
+        return score_hand_total(hand, starter), None
     scores = HandScore(
         fifteens=score_hand_fifteens(hand, starter),
         pairs=score_hand_pairs(hand, starter),
@@ -120,6 +173,235 @@ def score_hand(hand: Hand, starter: Card) -> Tuple[int, HandScore]:
     return total, scores
 
 
+# A multiset of ranks is packed into an int with 3 bits of count per rank, so adding a
+# card to a multiset is a single addition and the packed value is a cheap cache key.
+RANK_BITS = (0,) + tuple(1 << (3 * (n - 1)) for n in range(1, 14))
+
+
+def rank_key(numbers) -> int:
+    """Return the packed key for a multiset of card numbers."""
+    return sum(RANK_BITS[n] for n in numbers)
+
+
+@functools.lru_cache(maxsize=None)
+def score_ranks(key: int) -> int:
+    """
+    Score the fifteens, pairs and runs for a packed multiset of ranks.
+
+    These only depend on the ranks, so there are 6,175 distinct results for a hand and
+    starter and each is computed once.
+    """
+    counts = [(key >> (3 * (n - 1))) & 0b111 for n in range(1, 14)]
+    fifteens = count_fifteens(min(n, 10) for n in range(1, 14) for _ in range(counts[n - 1]))
+    pairs = sum(c * (c - 1) // 2 for c in counts)
+    runs = 0
+    run_length = 0
+    multiplier = 1
+    for count in counts + [0]:
+        if count > 0:
+            run_length += 1
+            multiplier *= count
+        else:
+            if run_length >= 3:
+                runs = run_length * multiplier
+                break
+            run_length = 0
+            multiplier = 1
+    return 2 * fifteens + 2 * pairs + runs
+
+
+def score_hand_total(hand: Hand, starter: Card) -> int:
+    """
+    Return the same total as score_hand, using the memoized rank scores.
+
+    This is the fast path for callers that only need the number: it makes a single
+    pass over the cards and builds no lists, combinations or explanations.
+    """
+    cards = hand.cards()
+    suit = starter.suit()
+    first_suit = cards[0].suit() if cards else suit
+    key = RANK_BITS[starter.number()]
+    starter_flush = True
+    hand_flush = True
+    his_nobs = 0
+    for card in cards:
+        key += RANK_BITS[card.number()]
+        card_suit = card.suit()
+        if card_suit is not suit:
+            starter_flush = False
+        elif card.number() == JACK:
+            his_nobs = 1
+        if card_suit is not first_suit:
+            hand_flush = False
+    total = score_ranks(key) + his_nobs
+    if starter_flush:
+        total += 5
+    elif hand_flush and not hand.is_crib:
+        total += 4
+    return total
+
+
+class PartialHand:
+    """
+    The parts of a hand's score that are known before the starter is cut.
+
+    Scoring the hand with a starter is then one lookup in the rank table plus two
+    suit checks.
+    """
+
+    __slots__ = ("key", "flush_suit", "nobs_suits", "is_crib")
+
+    def __init__(self, hand: Hand):
+        cards = hand.cards()
+        self.key = rank_key(c.number() for c in cards)
+        suits = {c.suit() for c in cards}
+        self.flush_suit = suits.pop() if len(suits) == 1 else None
+        self.nobs_suits = frozenset(c.suit() for c in cards if c.number() == JACK)
+        self.is_crib = hand.is_crib
+
+    def score(self, starter: Card) -> int:
+        """Return the score of the hand with the starter."""
+        total = score_ranks(self.key + RANK_BITS[starter.number()])
+        suit = starter.suit()
+        if self.flush_suit is not None:
+            if suit is self.flush_suit:
+                total += 5
+            elif not self.is_crib:
+                total += 4
+        if suit in self.nobs_suits:
+            total += 1
+        return total
+
+
+def starter_classes(hand: Hand, remaining_deck: Iterable[Card]) -> List[List[Card]]:
+    """
+    Group the starters into classes that are guaranteed to give the hand the same score.
+
+    A starter's suit only matters if it could complete a flush or his nobs, so starters
+    of the same rank are grouped unless their suit is the hand's flush suit or the suit
+    of a jack in the hand.
+    """
+    partial = PartialHand(hand)
+    relevant_suits = set(partial.nobs_suits)
+    if partial.flush_suit is not None:
+        relevant_suits.add(partial.flush_suit)
+    classes: Dict[Tuple[int, Optional[Suit]], List[Card]] = {}
+    for starter in remaining_deck:
+        suit = starter.suit() if starter.suit() in relevant_suits else None
+        classes.setdefault((starter.number(), suit), []).append(starter)
+    return list(classes.values())
+
+
+def expected_score(hand: Hand, remaining_deck: Iterable[Card]) -> float:
+    """Return the average score of a hand over the possible starters."""
+    partial = PartialHand(hand)
+    classes = starter_classes(hand, remaining_deck)
+    total = sum(partial.score(members[0]) * len(members) for members in classes)
+    count = sum(len(members) for members in classes)
+    if count == 0:
+        raise ValueError("There must be at least one possible starter")
+    return total / count
+
+
+StarterDistribution = namedtuple("StarterDistribution", "scores histogram mean variance min max")
+
+
+def starter_distribution(hand: Hand, remaining_deck: Iterable[Card]) -> StarterDistribution:
+    """
+    Return the score of a hand for every possible starter and summary statistics.
+
+    scores maps each starter to the hand's score and histogram maps each score to the
+    number of starters that give it.
+    """
+    partial = PartialHand(hand)
+    scores = {}
+    for members in starter_classes(hand, remaining_deck):
+        score = partial.score(members[0])
+        for starter in members:
+            scores[starter] = score
+    if len(scores) == 0:
+        raise ValueError("There must be at least one possible starter")
+    histogram = dict(sorted(Counter(scores.values()).items()))
+    mean = sum(scores.values()) / len(scores)
+    variance = sum(n * (s - mean) ** 2 for s, n in histogram.items()) / len(scores)
+    return StarterDistribution(
+        scores=scores,
+        histogram=histogram,
+        mean=mean,
+        variance=variance,
+        min=min(histogram),
+        max=max(histogram),
+    )
+
+
+BatchScores = namedtuple("BatchScores", "total fifteens pairs runs flush his_nobs")
+
+
+def _batch_tables():
+    """Return the subset and pair index tables used by score_hands_batch."""
+    subsets = np.array(
+        [[(subset >> i) & 1 for subset in range(32)] for i in range(5)], dtype=np.int16
+    )
+    pairs = np.array(list(itertools.combinations(range(5), 2)))
+    return subsets, pairs[:, 0], pairs[:, 1]
+
+
+def score_hands_batch(hands, starters, is_crib=False, categories=False):
+    """
+    Score many hands at once with NumPy.
+
+    hands is an (N, 4) array of card ids and starters is an (N,) or (N, K) array of
+    card ids. is_crib is a bool or an (N,) array of bools. Returns an integer array of
+    totals with the shape of starters, or a BatchScores of arrays if categories is True.
+    """
+    if np is None:
+        raise ImportError("score_hands_batch requires numpy")
+    hands = np.asarray(hands, dtype=np.int16)
+    starters = np.asarray(starters, dtype=np.int16)
+    one_starter = starters.ndim == 1
+    if one_starter:
+        starters = starters[:, None]
+    is_crib = np.asarray(is_crib, dtype=bool)
+    if is_crib.ndim == 1:
+        is_crib = is_crib[:, None]
+    cards = np.concatenate(
+        [np.broadcast_to(hands[:, None, :], starters.shape + (4,)), starters[:, :, None]], axis=2
+    )
+    ranks = cards >> 2
+    suits = cards & 3
+    subsets, first, second = _batch_tables()
+
+    fifteens = 2 * (np.minimum(ranks + 1, 10) @ subsets == 15).sum(axis=-1)
+    pairs = 2 * (ranks[..., first] == ranks[..., second]).sum(axis=-1)
+
+    counts = (ranks[..., None] == np.arange(13)).sum(axis=-2)
+    runs = np.zeros(starters.shape, dtype=np.int64)
+    for length in (3, 4, 5):
+        # With five cards at most one run exists, so the longest window with every
+        # rank present wins and its count product is the number of runs.
+        windows = sum(
+            counts[..., start : start + length].prod(axis=-1) for start in range(14 - length)
+        )
+        runs = np.where(windows > 0, length * windows, runs)
+
+    hand_flush = (suits[..., :4] == suits[..., :1]).all(axis=-1)
+    starter_flush = hand_flush & (suits[..., 4] == suits[..., 0])
+    flush = np.where(starter_flush, 5, np.where(hand_flush & ~is_crib, 4, 0))
+    his_nobs = ((ranks[..., :4] == JACK - 1) & (suits[..., :4] == suits[..., 4:])).any(axis=-1)
+
+    scores = BatchScores(
+        total=fifteens + pairs + runs + flush + his_nobs,
+        fifteens=fifteens,
+        pairs=pairs,
+        runs=runs,
+        flush=flush,
+        his_nobs=his_nobs.astype(np.int64),
+    )
+    if one_starter:
+        scores = BatchScores(*(a[:, 0] for a in scores))
+    return scores if categories else scores.total
+
+
 def print_explanations(explanation):
     """Print the explanations for the cribbage score."""
     if explanation.fifteens.total > 0:
@@ -144,13 +426,13 @@ def print_explanations(explanation):
             print("  ", " ".join([Card.display(c) for c in cs]))
 
 
-def main():
+def main(deal_engine: Optional[DealEngine] = None):
     """Play a game of scoring cribbage hands."""
     while True:
-        deck = shuffled([Card(s, n) for s in Suit for n in range(1, 14)])
+        deck = shuffled([Card(s, n) for s in Suit for n in range(1, 14)], deal_engine)
         player_hand = Hand(deck[0:4])
         starter = deck[5]
-        score, explanation = score_hand(player_hand, starter)
+        score = score_hand_total(player_hand, starter)
         print()
         print(f"Hand: {player_hand.display()} Starter: {starter}")
         try:
@@ -162,7 +444,7 @@ def main():
             print("Correct!")
         else:
             print(f"Incorrect, score is {score}")
-            print_explanations(explanation)
+            print_explanations(score_hand(player_hand, starter)[1])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+"""
+Exhaustively verify a scoring engine against the reference score_hand.
+
+Every 4 card hand, starter and flush rule is checked: 2 x C(52, 4) x 48 cases. The hands
+are split into chunks by hand index, chunks are checked across a process pool, and each
+finished chunk is appended to a checkpoint file so an interrupted run can be resumed.
+"""
+
+import json
+import time
+import argparse
+import importlib
+import multiprocessing
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from cards.cards.card import Card, CARDS
+from cards.cribbage.hand import Hand
+from cards.cribbage.scoring import np, score_hand, score_hand_total, score_hands_batch, PartialHand
+from cards.cribbage.score_table import HANDS, hand_ids, score_hand_lookup
+
+Case = Tuple[Hand, Card]
+Mismatch = namedtuple("Mismatch", "hand starter is_crib expected actual")
+ChunkResult = namedtuple("ChunkResult", "chunk cases mismatches seconds")
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _per_case(score: Callable[[Hand, Card], int]) -> Callable[[Sequence[Case]], List[int]]:
+    """Turn a function that scores one hand into an engine that scores a list of cases."""
+    return lambda cases: [score(hand, starter) for hand, starter in cases]
+
+
+def _partial_engine(cases: Sequence[Case]) -> List[int]:
+    """Score the cases with PartialHand, reusing the partial state for each hand."""
+    scores = []
+    partial = None
+    previous_hand = None
+    for hand, starter in cases:
+        if hand is not previous_hand:
+            partial = PartialHand(hand)
+            previous_hand = hand
+        scores.append(partial.score(starter))
+    return scores
+
+
+def _batch_engine(cases: Sequence[Case]) -> List[int]:
+    """Score the cases with the NumPy batch scorer."""
+    if np is None:
+        raise ImportError("The batch engine requires numpy")
+    hands = [[c.id() for c in hand.cards()] for hand, _ in cases]
+    starters = [starter.id() for _, starter in cases]
+    is_crib = [hand.is_crib for hand, _ in cases]
+    return score_hands_batch(hands, starters, is_crib).tolist()
+
+
+ENGINES: Dict[str, Callable[[Sequence[Case]], List[int]]] = {
+    "total": _per_case(score_hand_total),
+    "lookup": _per_case(score_hand_lookup),
+    "partial": _partial_engine,
+    "batch": _batch_engine,
+}
+
+
+def load_engine(name: str) -> Callable[[Sequence[Case]], List[int]]:
+    """
+    Return an engine by name.
+
+    Besides the names in ENGINES, "module:function" loads a function that scores one
+    hand and starter, like score_hand_total.
+    """
+    if name in ENGINES:
+        return ENGINES[name]
+    if ":" in name:
+        module_name, function_name = name.split(":", 1)
+        return _per_case(getattr(importlib.import_module(module_name), function_name))
+    raise KeyError(f"Unknown engine {name}")
+
+
+def chunk_cases(chunk: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Case]:
+    """Return every case for the hands in a chunk."""
+    cases = []
+    for index in range(chunk * chunk_size, min((chunk + 1) * chunk_size, HANDS)):
+        ids = hand_ids(index)
+        cards = [CARDS[i] for i in ids]
+        for is_crib in (False, True):
+            hand = Hand(cards, is_crib=is_crib)
+            cases.extend((hand, CARDS[s]) for s in range(52) if s not in ids)
+    return cases
+
+
+def verify_chunk(engine_name: str, chunk: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ChunkResult:
+    """Compare an engine against score_hand for every case in a chunk."""
+    engine = load_engine(engine_name)
+    start = time.perf_counter()
+    cases = chunk_cases(chunk, chunk_size)
+    actual = engine(cases)
+    mismatches = []
+    for (hand, starter), score in zip(cases, actual):
+        expected = score_hand(hand, starter)[0]
+        if score != expected:
+            mismatches.append(
+                Mismatch(
+                    hand=[c.id() for c in hand.cards()],
+                    starter=starter.id(),
+                    is_crib=hand.is_crib,
+                    expected=expected,
+                    actual=score,
+                )
+            )
+    return ChunkResult(chunk, len(cases), mismatches, time.perf_counter() - start)
+
+
+def number_of_chunks(chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Return the number of chunks needed to cover every hand."""
+    return -(-HANDS // chunk_size)
+
+
+def read_checkpoint(
+    path: Optional[str], engine_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Dict[int, dict]:
+    """
+    Return the finished chunks recorded in a checkpoint file.
+
+    Each record names the engine and chunk size it was verified with, and records from
+    another engine or chunk size are ignored, so their chunks are verified again.
+    """
+    finished: Dict[int, dict] = {}
+    if path is None:
+        return finished
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if (
+                        record.get("engine") == engine_name
+                        and record.get("chunk_size") == chunk_size
+                    ):
+                        finished[record["chunk"]] = record
+    except FileNotFoundError:
+        pass
+    return finished
+
+
+def display_mismatch(mismatch: Mismatch) -> str:
+    """Return a string describing a mismatch."""
+    hand = " ".join(str(CARDS[i]) for i in mismatch.hand)
+    crib = " (crib)" if mismatch.is_crib else ""
+    return (
+        f"{hand} + {CARDS[mismatch.starter]}{crib}: "
+        f"expected {mismatch.expected}, got {mismatch.actual}"
+    )
+
+
+def _verify_chunk_args(args) -> ChunkResult:
+    return verify_chunk(*args)
+
+
+def verify(
+    engine_name: str,
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunks: Optional[range] = None,
+    checkpoint: Optional[str] = None,
+) -> List[Mismatch]:
+    """Verify an engine on every case across a process pool and return the mismatches."""
+    load_engine(engine_name)
+    if chunks is None:
+        chunks = range(number_of_chunks(chunk_size))
+    finished = read_checkpoint(checkpoint, engine_name, chunk_size)
+    todo = [c for c in chunks if c not in finished]
+    mismatches = [Mismatch(*m) for c in chunks if c in finished for m in finished[c]["mismatches"]]
+    print(f"{len(chunks) - len(todo)} of {len(chunks)} chunks already verified")
+    total_cases = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.imap_unordered(
+            _verify_chunk_args, [(engine_name, c, chunk_size) for c in todo]
+        )
+        for done, result in enumerate(results, 1):
+            total_cases += result.cases
+            mismatches.extend(result.mismatches)
+            if checkpoint is not None:
+                with open(checkpoint, "a", encoding="utf-8") as f:
+                    record = result._replace(mismatches=[list(m) for m in result.mismatches])
+                    record = {"engine": engine_name, "chunk_size": chunk_size, **record._asdict()}
+                    f.write(json.dumps(record) + "\n")
+            for mismatch in result.mismatches:
+                print(display_mismatch(mismatch))
+            elapsed = time.perf_counter() - start
+            print(
+                f"chunk {result.chunk}: {len(result.mismatches)} mismatches, "
+                f"{done}/{len(todo)} chunks, {total_cases / elapsed:,.0f} cases/s"
+            )
+    return mismatches
+
+
+def main():
+    """Verify a scoring engine against score_hand."""
+    parser = argparse.ArgumentParser(description="Verify a scoring engine against score_hand.")
+    parser.add_argument("engine", help=f"one of {', '.join(ENGINES)} or module:function")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--start-chunk", type=int, default=0)
+    parser.add_argument("--stop-chunk", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None, help="file recording finished chunks")
+    args = parser.parse_args()
+    stop = number_of_chunks(args.chunk_size) if args.stop_chunk is None else args.stop_chunk
+    mismatches = verify(
+        args.engine,
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+        chunks=range(args.start_chunk, stop),
+        checkpoint=args.checkpoint,
+    )
+    print(f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,8 +2,11 @@
 Tests for the Card class.
 """
 
+import copy
+import pickle
 import unittest
-from cards.cards.card import Card, Suit, JACK
+from cards.cards.card import Card, CardSet, Suit, JACK, DECK, CARDS, FULL_DECK, rest_of_deck
+from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
 
 
 class TestCard(unittest.TestCase):
@@ -16,6 +19,69 @@ class TestCard(unittest.TestCase):
         self.assertTrue(jack_of_clubs.opposite_color(ten_of_hearts))
         self.assertTrue(ten_of_hearts.opposite_color(jack_of_clubs))
 
+    def test_interned(self):
+        """Test that cards are shared objects."""
+        self.assertIs(Card(Suit.CLUBS, JACK), JACK_OF_CLUBS)
+        self.assertIs(copy.deepcopy(JACK_OF_CLUBS), JACK_OF_CLUBS)
+        self.assertIs(pickle.loads(pickle.dumps(JACK_OF_CLUBS)), JACK_OF_CLUBS)
+        self.assertEqual(len(set(DECK)), 52)
+
+    def test_ids(self):
+        """Test that card ids are in rank order."""
+        self.assertEqual([c.id() for c in CARDS], list(range(52)))
+        self.assertEqual(sorted(DECK, key=Card.id), list(CARDS))
+        self.assertIs(Card.from_id(JACK_OF_CLUBS.id()), JACK_OF_CLUBS)
+        self.assertEqual(JACK_OF_CLUBS.id() // 4 + 1, JACK)
+
+    def test_invalid_number(self):
+        """Test that an invalid card number is rejected."""
+        with self.assertRaises(AssertionError):
+            Card(Suit.CLUBS, 14)
+
+
+class TestCardSet(unittest.TestCase):
+    """Tests for the CardSet class."""
+
+    def test_set_operations(self):
+        """Test union, difference, intersection and membership."""
+        a = CardSet([HA, H5, SJ])
+        b = CardSet([H5, CK])
+        self.assertEqual(a | b, CardSet([HA, H5, SJ, CK]))
+        self.assertEqual(a - b, CardSet([HA, SJ]))
+        self.assertEqual(a & b, CardSet([H5]))
+        self.assertEqual(a - [HA], CardSet([H5, SJ]))
+        self.assertIn(SJ, a)
+        self.assertNotIn(CK, a)
+        self.assertEqual(len(a), 3)
+        self.assertEqual(len(FULL_DECK), 52)
+
+    def test_iteration_in_rank_order(self):
+        """Test that iteration is in rank order."""
+        self.assertEqual(list(CardSet([CK, HA, S5, H5])), [HA, H5, S5, CK])
+
+    def test_masks(self):
+        """Test the per suit and per rank subsets."""
+        a = CardSet([HA, H5, SJ, CJ, DJ])
+        self.assertEqual(a.suit(Suit.HEARTS), CardSet([HA, H5]))
+        self.assertEqual(a.rank(JACK), CardSet([SJ, CJ, DJ]))
+        self.assertEqual(len(FULL_DECK.suit(Suit.SPADES)), 13)
+        self.assertEqual(len(FULL_DECK.rank(5)), 4)
+
+    def test_add_remove(self):
+        """Test that add and remove return new sets."""
+        a = CardSet([HA])
+        self.assertEqual(a.add(H2), CardSet([HA, H2]))
+        self.assertEqual(a, CardSet([HA]))
+        self.assertEqual(a.remove(HA), CardSet())
+        with self.assertRaises(KeyError):
+            a.remove(H2)
+
+    def test_rest_of_deck(self):
+        """Test the rest of the deck."""
+        rest = rest_of_deck([HA, SK])
+        self.assertEqual(len(rest), 50)
+        self.assertEqual(set(rest), set(DECK) - {HA, SK})
+
 
 if __name__ == "__main__":
     unittest.main()
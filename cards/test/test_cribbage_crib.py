@@ -0,0 +1,117 @@
+"""
+Tests for exact crib expectations.
+"""
+
+import random
+import itertools
+import unittest
+from cards.cards.card import DECK, rest_of_deck
+from cards.cribbage.crib import (
+    OpponentCribValue,
+    RankedPolicy,
+    crib_expectation,
+    exact_crib_value,
+    exact_crib_table,
+    opponent_crib_values_batch,
+)
+from cards.cribbage.discards import rank_discards
+from cards.cribbage.hand import Hand
+from cards.cribbage.scoring import score_hand
+from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
+
+
+def enumerate_crib(discard, remaining_deck):
+    """Average the crib score over every thrown pair and starter."""
+    scores = [
+        score_hand(Hand(list(discard) + list(pair), is_crib=True), starter)[0]
+        for pair in itertools.combinations(remaining_deck, 2)
+        for starter in remaining_deck
+        if starter not in pair
+    ]
+    return sum(scores) / len(scores)
+
+
+class TestCribExpectation(unittest.TestCase):
+    """Test the exact crib expectation."""
+
+    def test_matches_enumeration(self):
+        """Test against scoring every crib on small remaining decks."""
+        rng = random.Random(9)
+        discards = [(HJ, H5), (S5, S6), (CJ, DJ)]
+        for discard in discards + [tuple(rng.sample(DECK, 2)) for _ in range(3)]:
+            remaining = rng.sample([c for c in DECK if c not in discard], 14)
+            remaining += [c for c in (HJ, H2, H3, SJ) if c not in discard + tuple(remaining)]
+            self.assertAlmostEqual(
+                crib_expectation(discard, remaining), enumerate_crib(discard, remaining)
+            )
+
+    def test_sign(self):
+        """Test that the crib counts against the discarder in the other player's crib."""
+        remaining = rest_of_deck([H5, S5, C2, D3, HJ, SK])
+        value = crib_expectation((H5, S5), remaining)
+        self.assertEqual(exact_crib_value((H5, S5), remaining, players_crib=True), value)
+        self.assertEqual(exact_crib_value((H5, S5), remaining, players_crib=False), -value)
+
+    def test_table(self):
+        """Test the regenerated table is symmetric and ranks fives highly."""
+        table = exact_crib_table(processes=1)
+        self.assertEqual(table[5][2], table[2][5])
+        self.assertGreater(table[5][5], table[13][9])
+
+    def test_rank_discards_with_exact_crib(self):
+        """Test ranking discards with the exact crib value."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        discards = rank_discards(hand, remaining, True, crib_value=exact_crib_value)
+        for discard in discards:
+            self.assertEqual(discard.crib_score, crib_expectation(discard.discard, remaining))
+
+
+class TestOpponentCribValue(unittest.TestCase):
+    """Test crib values against an opponent policy."""
+
+    def test_uniform_matches_exact(self):
+        """Test that a uniform opponent approaches the exact expectation."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        value = OpponentCribValue("uniform", samples=600, seed=1)
+        for discard in [(H5, S5), (D3, SK)]:
+            self.assertAlmostEqual(
+                value.crib_expectation(discard, remaining),
+                crib_expectation(discard, remaining),
+                delta=0.1,
+            )
+
+    def test_reproducible(self):
+        """Test that a seed gives the same values and signs follow the crib."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        first = OpponentCribValue("greedy", samples=20, seed=3).split_values(hand, remaining, True)
+        second = OpponentCribValue("greedy", samples=20, seed=3)
+        self.assertEqual(first, second.split_values(hand, remaining, True))
+        self.assertTrue(all(v > 0 for v in first))
+        self.assertTrue(all(v < 0 for v in second.split_values(hand, remaining, False)))
+
+    def test_ranked_policy(self):
+        """Test that the policy weights sum to one and a cold policy makes the best throw."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        throws = RankedPolicy(1.0)(hand, True)
+        self.assertAlmostEqual(sum(w for _, w in throws), 1)
+        best = rank_discards(hand, rest_of_deck(hand.cards()), True)[0].discard
+        self.assertEqual(RankedPolicy(0.0)(hand, True), [(best, 1.0)])
+
+    def test_batch(self):
+        """Test that the batch mode matches valuing each decision alone."""
+        decisions = [
+            (Hand([H5, S5, C2, D3, HJ, SK]), rest_of_deck([H5, S5, C2, D3, HJ, SK]), True),
+            (Hand([HA, H2, C9, DT, DQ, SK]), rest_of_deck([HA, H2, C9, DT, DQ, SK]), False),
+        ]
+        batch = opponent_crib_values_batch(decisions, "greedy", samples=10, seed=2, processes=1)
+        for decision, values in zip(decisions, batch):
+            self.assertEqual(
+                values, OpponentCribValue("greedy", samples=10, seed=2).split_values(*decision)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests for the precomputed discard book.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from cards.cards.card import Card, Suit, DECK, rest_of_deck
+from cards.cribbage.discard_book import (
+    DiscardBook,
+    build_discard_book,
+    canonical_key,
+    canonical_keys,
+    canonical_cards,
+)
+from cards.cribbage.discards import rank_discards, split_score_sums
+from cards.cribbage.hand import Hand
+
+
+def summary(discards):
+    """Return the discards with the hands as lists of cards."""
+    return [(d.hand.cards(), d.discard, d.hand_score, d.crib_score) for d in discards]
+
+
+def relabel(cards, order):
+    """Return the cards with their suits relabeled."""
+    suits = list(Suit)
+    return [Card(suits[order[c.suit().value - 1]], c.number()) for c in cards]
+
+
+class TestCanonicalHands(unittest.TestCase):
+    """Test canonicalizing hands under suit relabeling."""
+
+    def test_number_of_canonical_hands(self):
+        """Test the count matches Burnside's lemma for six card hands."""
+        self.assertEqual(len(canonical_keys()), 962988)
+
+    def test_relabeling_gives_same_key(self):
+        """Test that relabeled hands have the same canonical key."""
+        rng = random.Random(6)
+        for _ in range(50):
+            cards = rng.sample(DECK, 6)
+            order = rng.sample(range(4), 4)
+            key = canonical_key(cards)
+            self.assertEqual(canonical_key(relabel(cards, order)), key)
+            self.assertEqual(canonical_key(canonical_cards(key)), key)
+
+
+class TestDiscardBook(unittest.TestCase):
+    """Test building and reading a discard book."""
+
+    def test_book_matches_rank_discards(self):
+        """Test that the book gives the same ranking for relabeled hands."""
+        rng = random.Random(7)
+        hands = [rng.sample(DECK, 6) for _ in range(8)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.bin")
+            build_discard_book(
+                path, processes=1, chunk_size=3, keys=[canonical_key(h) for h in hands]
+            )
+            book = DiscardBook(path)
+            for cards in hands:
+                for players_crib in (False, True):
+                    hand = Hand(relabel(cards, rng.sample(range(4), 4)))
+                    expected = rank_discards(hand, rest_of_deck(hand.cards()), players_crib)
+                    self.assertEqual(
+                        summary(book.rank_discards(hand, players_crib)), summary(expected)
+                    )
+            with self.assertRaises(KeyError):
+                book.split_sums(rng.sample(DECK, 6))
+
+    def test_resume_ignores_other_chunks(self):
+        """Test that parts left by a build with another chunk size are not reused."""
+        hands = [DECK[i : i + 6] for i in range(0, 42, 6)]
+        keys = [canonical_key(h) for h in hands]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.bin")
+            work_dir = os.path.join(directory, "parts")
+            with mock.patch("os.remove"), mock.patch("os.rmdir"):
+                build_discard_book(path, processes=1, chunk_size=2, work_dir=work_dir, keys=keys)
+            self.assertEqual(len(os.listdir(work_dir)), 4)
+            build_discard_book(path, processes=1, chunk_size=3, work_dir=work_dir, keys=keys)
+            book = DiscardBook(path)
+            for cards in hands:
+                self.assertEqual(
+                    book.split_sums(cards), split_score_sums(cards, rest_of_deck(cards))
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
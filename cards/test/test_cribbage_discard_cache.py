@@ -0,0 +1,103 @@
+"""
+Tests for the discard ranking cache.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+import functools
+from cards.cards.card import Card, Suit, DECK, rest_of_deck
+from cards.cribbage.discard_cache import DiscardCache
+from cards.cribbage.discards import rank_discards
+from cards.cribbage.hand import Hand
+from cards.cribbage.pegging_simulator import PeggingValue
+
+
+def summary(discards):
+    """Return the discards with the hands as lists of cards."""
+    return [(d.hand.cards(), d.discard, d.hand_score, d.crib_score) for d in discards]
+
+
+def relabel(cards, order):
+    """Return the cards with their suits relabeled."""
+    suits = list(Suit)
+    return [Card(suits[order[c.suit().value - 1]], c.number()) for c in cards]
+
+
+class TestDiscardCache(unittest.TestCase):
+    """Test the discard ranking cache."""
+
+    def test_relabeled_hands_hit(self):
+        """Test that hands differing only by suit share an entry and rank the same."""
+        rng = random.Random(8)
+        cache = DiscardCache()
+        for _ in range(20):
+            cards = rng.sample(DECK, 8)
+            for _ in range(3):
+                relabeled = relabel(cards, rng.sample(range(4), 4))
+                hand = Hand(relabeled[:6])
+                remaining = rest_of_deck(relabeled)
+                cached = summary(cache.rank_discards(hand, remaining, True))
+                expected = summary(rank_discards(hand, remaining, True))
+                # Splits that tie may come back in the order of the first labeling.
+                self.assertCountEqual(cached, expected)
+                self.assertEqual([d[2:] for d in cached], [d[2:] for d in expected])
+        stats = cache.stats()
+        self.assertEqual(stats.misses, 20)
+        self.assertEqual(stats.hits, 40)
+
+    def test_removed_cards_and_crib_are_in_the_key(self):
+        """Test that known removed cards and whose crib it is change the key."""
+        cache = DiscardCache()
+        hand = Hand(DECK[:6])
+        cache.rank_discards(hand, rest_of_deck(DECK[:6]))
+        cache.rank_discards(hand, rest_of_deck(DECK[:7]))
+        cache.rank_discards(hand, rest_of_deck(DECK[:6]), players_crib=True)
+        self.assertEqual(cache.stats().misses, 3)
+
+    def test_lru_eviction(self):
+        """Test that the in-memory tier is bounded."""
+        cache = DiscardCache(maxsize=2)
+        for start in range(0, 18, 6):
+            cards = DECK[start : start + 6]
+            cache.rank_discards(Hand(cards), rest_of_deck(cards))
+        self.assertEqual(cache.stats().evictions, 1)
+        self.assertEqual(cache.stats().size, 2)
+
+    def test_disk_tier(self):
+        """Test that rankings survive in the on-disk tier and can be read only."""
+        cards = DECK[10:16]
+        hand = Hand(cards)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "discards.sqlite")
+            cache = DiscardCache(path=path)
+            expected = summary(cache.rank_discards(hand, rest_of_deck(cards)))
+            cache.close()
+            reader = DiscardCache(path=path, read_only=True)
+            self.assertEqual(summary(reader.rank_discards(hand, rest_of_deck(cards))), expected)
+            self.assertEqual(reader.stats().disk_hits, 1)
+            self.assertEqual(reader.stats().misses, 0)
+            reader.close()
+
+    def test_hit_keeps_wrapped_ranking(self):
+        """Test that a hit returns every score and the order of the wrapped ranking."""
+        rank = functools.partial(rank_discards, pegging_value=PeggingValue(samples=20, seed=3))
+        cards = DECK[20:26]
+        hand = Hand(cards)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiscardCache(path=os.path.join(directory, "discards.sqlite"), rank=rank)
+            miss = cache.rank_discards(hand, rest_of_deck(cards))
+            hit = cache.rank_discards(hand, rest_of_deck(cards))
+            cache.clear()
+            disk_hit = cache.rank_discards(hand, rest_of_deck(cards))
+            cache.close()
+        self.assertEqual(cache.stats().disk_hits, 1)
+        self.assertTrue(any(d.pegging_score != 0 for d in miss))
+        expected = [(d.hand.cards(), d.discard, d[2:]) for d in miss]
+        for discards in (hit, disk_hit):
+            self.assertEqual([(d.hand.cards(), d.discard, d[2:]) for d in discards], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for ranking discards by sampling.
+"""
+
+import unittest
+from cards.cards.card import rest_of_deck
+from cards.cribbage.discard_sampling import DiscardSampler, sample_discards
+from cards.cribbage.discards import rank_discards
+from cards.cribbage.hand import Hand
+from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
+
+
+def summary(result):
+    """Return the comparable parts of a sampled ranking."""
+    return (
+        [(d.discard, d.hand_score, d.crib_score) for d in result.discards],
+        result.half_widths,
+        result.samples,
+        result.separated,
+    )
+
+
+class TestSampleDiscards(unittest.TestCase):
+    """Test sampling discards."""
+
+    def test_stops_early(self):
+        """Test that a clear best discard stops sampling early."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        result = sample_discards(hand, rest_of_deck(hand.cards()), True, "greedy", seed=1)
+        self.assertTrue(result.separated)
+        self.assertLess(result.samples, 2000)
+        self.assertEqual(set(result.discards[0].discard), {C2, D3})
+        self.assertEqual(len(result.half_widths), 15)
+
+    def test_max_samples(self):
+        """Test that sampling stops at max_samples when splits cannot be separated."""
+        hand = Hand([HA, SA, C9, D9, HK, SK])
+        result = sample_discards(
+            hand,
+            rest_of_deck(hand.cards()),
+            False,
+            "uniform",
+            min_samples=8,
+            max_samples=40,
+            seed=2,
+        )
+        self.assertLessEqual(result.samples, 40)
+        self.assertGreaterEqual(result.samples, 8)
+
+    def test_reproducible(self):
+        """Test that the same seed gives the same ranking."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        first = sample_discards(hand, remaining, False, "uniform", max_samples=50, seed=3)
+        second = sample_discards(hand, remaining, False, "uniform", max_samples=50, seed=3)
+        self.assertEqual(summary(first), summary(second))
+
+    def test_hand_scores(self):
+        """Test that the sampled hand scores are close to the exact ones."""
+        hand = Hand([HA, S4, C6, D9, HT, SK])
+        remaining = rest_of_deck(hand.cards())
+        sampler = DiscardSampler(hand, remaining, True, "uniform", seed=4)
+        sampler.run(300)
+        sampled = {frozenset(d.discard): d for d in sampler.ranking().discards}
+        for exact in rank_discards(hand, remaining, True):
+            self.assertAlmostEqual(
+                sampled[frozenset(exact.discard)].hand_score, exact.hand_score, delta=0.3
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Tests for the crib discard table generator.
+"""
+
+import os
+import tempfile
+import unittest
+from cards.cribbage.discard_table_generator import (
+    TABLES,
+    format_tables,
+    generate_tables,
+    read_table_array,
+    simulate_cell,
+    table_array,
+)
+
+
+class TestSimulateCell(unittest.TestCase):
+    """Test simulating one cell."""
+
+    def test_reproducible(self):
+        """Test that the same seed gives the same result and another seed does not."""
+        first = simulate_cell(TABLES[0], 5, 5, 200, seed=3, opponent="random")
+        self.assertEqual(first, simulate_cell(TABLES[0], 5, 5, 200, seed=3, opponent="random"))
+        self.assertNotEqual(first, simulate_cell(TABLES[0], 5, 5, 200, seed=4, opponent="random"))
+
+    def test_interval(self):
+        """Test that a pair of fives makes a good crib with a sensible interval."""
+        result = simulate_cell(TABLES[0], 5, 5, 400, seed=1, opponent="greedy")
+        self.assertEqual(result.samples, 400)
+        self.assertGreater(result.half_width, 0)
+        self.assertLess(abs(result.mean - 8.5), 4 * result.half_width + 1)
+
+
+class TestGenerateTables(unittest.TestCase):
+    """Test generating and writing whole tables."""
+
+    def test_bit_identical(self):
+        """Test that rerunning with a seed writes identical files in both layouts."""
+        outputs = []
+        for processes in (1, 2):
+            tables = generate_tables(5, seed=7, opponent="random", processes=processes)
+            outputs.append((format_tables(tables, "test"), table_array(tables).tobytes()))
+        self.assertEqual(outputs[0], outputs[1])
+
+        tables = generate_tables(5, seed=7, opponent="random", processes=1)
+        for table in TABLES:
+            for x in range(1, 14):
+                for y in range(1, 14):
+                    self.assertEqual(tables.means[table][x][y], tables.means[table][y][x])
+        namespace = {}
+        exec(outputs[0][0], namespace)  # pylint: disable=exec-used
+        self.assertAlmostEqual(namespace[TABLES[0]][3][9], tables.means[TABLES[0]][3][9], 2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tables.bin")
+            with open(path, "wb") as f:
+                table_array(tables).tofile(f)
+            read = read_table_array(path)
+        self.assertEqual(read.means, tables.means)
+        self.assertEqual(read.half_widths, tables.half_widths)
+
+
+if __name__ == "__main__":
+    unittest.main()
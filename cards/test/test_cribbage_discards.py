@@ -0,0 +1,221 @@
+"""
+Tests for ranking discards in cribbage.
+"""
+
+import random
+import itertools
+import unittest
+from cards.cards.card import DECK, rest_of_deck
+from cards.cribbage.crib import exact_crib_value
+from cards.cribbage.discards import (
+    OBJECTIVES,
+    best_discards,
+    crib_value_bound,
+    discard_profiles,
+    hail_mary_objective,
+    hand_score_bounds,
+    iter_rank_discards,
+    rank_discards,
+    rank_discards_within,
+    split_score_histograms,
+    split_score_sums,
+)
+from cards.cribbage.hand import Hand
+from cards.cribbage.scoring import score_hand
+from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
+
+
+def reference_sums(cards, remaining_deck):
+    """Score every split and starter with score_hand."""
+    return [
+        sum(
+            score_hand(Hand([c for c in cards if c not in discard]), starter)[0]
+            for starter in remaining_deck
+        )
+        for discard in itertools.combinations(cards, 2)
+    ]
+
+
+class TestRankDiscards(unittest.TestCase):
+    """Test ranking discards."""
+
+    def test_split_sums_match_score_hand(self):
+        """Test the shared split scores against score_hand."""
+        rng = random.Random(4)
+        hands = [[HJ, H5, H6, H7, S5, DJ], [C2, C4, C6, C8, CT, CQ]]
+        hands += [rng.sample(DECK, 6) for _ in range(10)]
+        for cards in hands:
+            cards = Hand(cards).cards()
+            remaining = rest_of_deck(cards)
+            self.assertEqual(split_score_sums(cards, remaining), reference_sums(cards, remaining))
+
+    def test_rank_discards(self):
+        """Test the ranked discards for a hand."""
+        hand = Hand([H5, S5, D5, CJ, SK, H2])
+        discards = rank_discards(hand, rest_of_deck(hand.cards()), players_crib=True)
+        self.assertEqual(len(discards), 15)
+        self.assertEqual(set(discards[0].discard), {H2, CJ})
+        self.assertAlmostEqual(discards[0].hand_score, 16.26, places=2)
+        totals = [d.hand_score + d.crib_score for d in discards]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+
+class TestBestDiscards(unittest.TestCase):
+    """Test the branch and bound top k search."""
+
+    def test_bounds(self):
+        """Test that the bounds hold for every starter."""
+        rng = random.Random(6)
+        for _ in range(50):
+            cards = rng.sample(DECK, 4)
+            lower, upper = hand_score_bounds(cards)
+            for starter in rest_of_deck(cards):
+                score = score_hand(Hand(cards), starter)[0]
+                self.assertLessEqual(lower, score)
+                self.assertLessEqual(score, upper)
+
+    def test_matches_rank_discards(self):
+        """Test that the top k and their order match rank_discards."""
+        rng = random.Random(7)
+        hands = [[H5, S5, C5, D5, HJ, SK], [HA, H2, H3, H4, H6, H7]]
+        for cards in hands + [rng.sample(DECK, 6) for _ in range(100)]:
+            remaining = rest_of_deck(cards)
+            for k in (1, 3, 15):
+                for players_crib in (False, True):
+                    top = best_discards(Hand(cards), remaining, k, players_crib)
+                    full = rank_discards(Hand(cards), remaining, players_crib)
+                    self.assertEqual(summary(top.discards), summary(full[:k]))
+                    self.assertLessEqual(top.pruned, 15 - k)
+
+    def test_prunes(self):
+        """Test that an obvious best discard prunes splits."""
+        hand = Hand([H5, S5, C5, DJ, HA, SK])
+        top = best_discards(hand, rest_of_deck(hand.cards()), 1, True)
+        self.assertEqual(set(top.discards[0].discard), {HA, SK})
+        self.assertGreater(top.pruned, 0)
+
+    def test_skips_crib_values(self):
+        """Test that exact crib values are only computed for discards still in contention."""
+        hand = Hand([H5, S5, C5, DJ, HA, SK])
+        remaining = rest_of_deck(hand.cards())
+        valued = []
+
+        def counting_crib_value(discard, remaining_deck, players_crib):
+            valued.append(discard)
+            return exact_crib_value(discard, remaining_deck, players_crib)
+
+        top = best_discards(hand, remaining, 1, False, counting_crib_value)
+        full = rank_discards(hand, remaining, False, exact_crib_value)
+        self.assertEqual(summary(top.discards), summary(full[:1]))
+        self.assertEqual(len(valued), 2)
+        self.assertEqual(top.pruned, 9)
+
+    def test_matches_rank_discards_with_exact_cribs(self):
+        """Test the lazy crib values against rank_discards on random hands."""
+        rng = random.Random(9)
+        for _ in range(5):
+            cards = rng.sample(DECK, 6)
+            remaining = rest_of_deck(cards)
+            for players_crib in (False, True):
+                top = best_discards(Hand(cards), remaining, 3, players_crib, exact_crib_value)
+                full = rank_discards(Hand(cards), remaining, players_crib, exact_crib_value)
+                self.assertEqual(summary(top.discards), summary(full[:3]))
+
+    def test_crib_value_bound(self):
+        """Test that the crib bound holds for exact crib values."""
+        rng = random.Random(10)
+        for _ in range(20):
+            cards = rng.sample(DECK, 6)
+            for players_crib in (False, True):
+                bound = crib_value_bound(cards[:2], rest_of_deck(cards), players_crib)
+                value = exact_crib_value(cards[:2], rest_of_deck(cards), players_crib)
+                self.assertLessEqual(value, bound)
+
+
+class TestObjectives(unittest.TestCase):
+    """Test ranking discards by other objectives."""
+
+    def test_histograms(self):
+        """Test the histograms against score_hand."""
+        rng = random.Random(9)
+        hands = [[HJ, H5, H6, H7, S5, DJ], [C2, C4, C6, C8, CT, CQ]]
+        for cards in hands + [rng.sample(DECK, 6) for _ in range(5)]:
+            remaining = rest_of_deck(cards)
+            for discard, histogram in zip(
+                itertools.combinations(cards, 2), split_score_histograms(cards, remaining)
+            ):
+                hand = Hand([c for c in cards if c not in discard])
+                expected = {}
+                for starter in remaining:
+                    score = score_hand(hand, starter)[0]
+                    expected[score] = expected.get(score, 0) + 1
+                self.assertEqual(histogram, dict(sorted(expected.items())))
+
+    def test_mean_is_default(self):
+        """Test that the mean objective ranks like rank_discards."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        self.assertEqual(
+            summary(rank_discards(hand, remaining, True, objective="mean")),
+            summary(rank_discards(hand, remaining, True)),
+        )
+
+    def test_objectives(self):
+        """Test the floor and hail mary objectives."""
+        hand = Hand([H5, S5, C5, D4, H6, SK])
+        remaining = rest_of_deck(hand.cards())
+        profiles = discard_profiles(hand, remaining, False)
+        best_floor = max(profiles, key=lambda p: OBJECTIVES["floor"](p[1]))[0]
+        self.assertEqual(
+            rank_discards(hand, remaining, objective="floor")[0].discard, best_floor.discard
+        )
+        hail_mary = rank_discards(hand, remaining, objective=hail_mary_objective(20))
+        chances = [
+            hail_mary_objective(20)(p)
+            for d in hail_mary
+            for discard, p in profiles
+            if discard.discard == d.discard
+        ]
+        self.assertEqual(chances, sorted(chances, reverse=True))
+        self.assertGreater(chances[0], 0)
+
+
+def summary(discards):
+    """Return the comparable parts of a ranking."""
+    return [(d.discard, d.hand_score, d.crib_score) for d in discards]
+
+
+class TestAnytimeRanking(unittest.TestCase):
+    """Test refining a ranking against a deadline."""
+
+    def test_refinements(self):
+        """Test that the last refinement is exact and matches rank_discards."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        rankings = list(iter_rank_discards(hand, remaining, True, exact_crib_value))
+        self.assertEqual(len(rankings), 16)
+        self.assertEqual([r.exact for r in rankings], [False] * 15 + [True])
+        self.assertEqual(
+            summary(rankings[-1].discards),
+            summary(rank_discards(hand, remaining, True, exact_crib_value)),
+        )
+
+    def test_table_is_exact(self):
+        """Test that the static table ranking needs no refinement."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        ranking = rank_discards_within(hand, remaining, False, deadline_ms=0)
+        self.assertTrue(ranking.exact)
+        self.assertEqual(summary(ranking.discards), summary(rank_discards(hand, remaining)))
+
+    def test_deadline(self):
+        """Test that an expired deadline returns the first ranking."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        ranking = rank_discards_within(hand, remaining, True, exact_crib_value, deadline_ms=0)
+        self.assertFalse(ranking.exact)
+        self.assertEqual(len(ranking.discards), 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,8 +2,10 @@
 Test the scoring of the pegging phase of cribbage.
 """
 
+import random
 import unittest
-from cards.cribbage.pegging import CardsInPlay, PeggingScore
+from cards.cards.card import DECK
+from cards.cribbage.pegging import CardsInPlay, PeggingScore, PlayedCard
 from cards.cribbage.players import Player
 from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
 
@@ -168,6 +170,16 @@ class TestPegging(unittest.TestCase):
         score = cards_in_play.play(Player.PLAYER2, FOUR_OF_DIAMONDS)
         self.assertZeroScore(score)
 
+    def test_run_after_pair(self):
+        """Test that a run can start from the second card of a pair."""
+        cards_in_play = CardsInPlay()
+        self.assertZeroScore(cards_in_play.play(Player.PLAYER1, THREE_OF_HEARTS))
+        score = cards_in_play.play(Player.PLAYER2, THREE_OF_SPADES)
+        self.assertEqual(score[Player.PLAYER2], PeggingScore(0, 0, 0, 2, 0, 2))
+        self.assertZeroScore(cards_in_play.play(Player.PLAYER1, FOUR_OF_DIAMONDS))
+        score = cards_in_play.play(Player.PLAYER2, FIVE_OF_SPADES)
+        self.assertEqual(score[Player.PLAYER2], PeggingScore(2, 0, 0, 0, 3, 5))
+
     def test_triple_king_thirtyone(self):
         """Test a triple king then an ace for 31."""
         cards_in_play = CardsInPlay()
@@ -295,5 +307,61 @@ class TestPegging(unittest.TestCase):
         self.assertEqual(cards_in_play.count(), 10)
 
 
+def observe(cards_in_play):
+    """Return everything that can be seen of a CardsInPlay."""
+    return (
+        cards_in_play.count(),
+        cards_in_play.points(Player.PLAYER1),
+        cards_in_play.points(Player.PLAYER2),
+        cards_in_play.return_cards(Player.PLAYER1),
+        cards_in_play.return_cards(Player.PLAYER2),
+        [cards_in_play.score_play(PlayedCard(Player.PLAYER1, card)) for card in DECK[:13]],
+    )
+
+
+class TestPushPop(unittest.TestCase):
+    """Test undoing plays and gos."""
+
+    def test_push_matches_play(self):
+        """Test that push scores like play and go."""
+        pushed, played = CardsInPlay(), CardsInPlay()
+        for player, card in [(Player.PLAYER1, H5), (Player.PLAYER2, HK), (Player.PLAYER1, S5)]:
+            self.assertEqual(pushed.push(player, card), played.play(player, card))
+        self.assertEqual(pushed.push(Player.PLAYER2), played.go(Player.PLAYER2))
+        self.assertEqual(observe(pushed), observe(played))
+
+    def test_pop_restores(self):
+        """Test that popping restores every earlier state."""
+        rng = random.Random(10)
+        for _ in range(100):
+            cards_in_play = CardsInPlay()
+            history = [observe(cards_in_play)]
+            pushed = []
+            for card in rng.sample(DECK, 12):
+                player = rng.choice([Player.PLAYER1, Player.PLAYER2])
+                if rng.random() < 0.3 or not cards_in_play.score_play(PlayedCard(player, card))[0]:
+                    card = None
+                cards_in_play.push(player, card)
+                pushed.append(card)
+                history.append(observe(cards_in_play))
+            while pushed:
+                history.pop()
+                popped = cards_in_play.pop()
+                card = pushed.pop()
+                self.assertEqual(None if popped is None else popped.card, card)
+                self.assertEqual(observe(cards_in_play), history[-1])
+
+    def test_invalid_push(self):
+        """Test that a push over 31 raises and leaves nothing to pop."""
+        cards_in_play = CardsInPlay()
+        cards_in_play.push(Player.PLAYER1, HK)
+        cards_in_play.push(Player.PLAYER2, SK)
+        cards_in_play.push(Player.PLAYER1, DK)
+        with self.assertRaises(ValueError):
+            cards_in_play.push(Player.PLAYER2, CK)
+        self.assertEqual(cards_in_play.pop().card, DK)
+        self.assertEqual(cards_in_play.count(), 20)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for the headless pegging simulator.
+"""
+
+import random
+import unittest
+from cards.cards.card import DECK, rest_of_deck
+from cards.cribbage.discards import rank_discards
+from cards.cribbage.hand import Hand
+from cards.cribbage.pegging import CardsInPlay, PlayedCard, is_run
+from cards.cribbage.pegging_simulator import (
+    PeggingState,
+    PeggingValue,
+    greedy_policy,
+    simulate_pegging,
+)
+from cards.cribbage.players import Player
+from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
+
+
+def peg_with_cards_in_play(hands, leader):
+    """Peg out two hands of cards greedily with CardsInPlay."""
+    players = (Player.PLAYER1, Player.PLAYER2)
+    hands = [sorted(hand, key=lambda c: c.id()) for hand in hands]
+    cards_in_play = CardsInPlay()
+    turn = leader
+    while hands[0] or hands[1]:
+        scores = [
+            (score[2].total, card)
+            for card in hands[turn]
+            if (score := cards_in_play.score_play(PlayedCard(players[turn], card)))[0]
+        ]
+        if scores:
+            card = max(scores, key=lambda s: s[0])[1]
+            hands[turn].remove(card)
+            cards_in_play.play(players[turn], card)
+        else:
+            cards_in_play.go(players[turn])
+        turn = 1 - turn
+    return cards_in_play.points(players[0]), cards_in_play.points(players[1])
+
+
+class TestPeggingState(unittest.TestCase):
+    """Test scoring plays by number."""
+
+    def test_is_run(self):
+        """Test the contiguous mask check."""
+        self.assertTrue(is_run(0b111000))
+        self.assertTrue(is_run(0b1))
+        self.assertFalse(is_run(0b1011))
+
+    def test_scores(self):
+        """Test pairs, runs, fifteens and 31."""
+        state = PeggingState()
+        self.assertEqual(state.play(0, 3), 0)
+        self.assertEqual(state.play(1, 5), 0)
+        self.assertEqual(state.play(0, 4), 3)
+        self.assertEqual(state.play(1, 2), 4)
+        self.assertEqual(state.play(0, 2), 2)
+        self.assertEqual(state.play(1, 2), 6)
+        self.assertEqual(state.play(0, 13), 0)
+        self.assertFalse(state.can_play(10))
+        self.assertEqual(state.go(1), 1)
+        self.assertEqual(state.go(0), 0)
+        self.assertEqual(state.count, 0)
+        self.assertEqual(state.points, [6, 10])
+
+
+class TestSimulatePegging(unittest.TestCase):
+    """Test pegging out hands."""
+
+    def test_matches_cards_in_play(self):
+        """Test random greedy games against CardsInPlay."""
+        rng = random.Random(8)
+        for _ in range(500):
+            cards = rng.sample(DECK, 8)
+            leader = rng.randrange(2)
+            numbers = ([c.number() for c in cards[:4]], [c.number() for c in cards[4:]])
+            self.assertEqual(
+                simulate_pegging(numbers, leader, (greedy_policy, greedy_policy)),
+                peg_with_cards_in_play([cards[:4], cards[4:]], leader),
+            )
+
+    def test_pegging_value(self):
+        """Test the pegging differential is reproducible and used in the ranking."""
+        hand = Hand([H5, S5, C2, D3, HJ, SK])
+        remaining = rest_of_deck(hand.cards())
+        value = PeggingValue(samples=50, seed=1)
+        self.assertEqual(
+            value([H5, S5, C2, D3], remaining, True),
+            PeggingValue(samples=50, seed=1)([H5, S5, C2, D3], remaining, True),
+        )
+        discards = rank_discards(hand, remaining, True, pegging_value=value)
+        totals = [d.hand_score + d.crib_score + d.pegging_score for d in discards]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+        self.assertTrue(any(d.pegging_score != 0 for d in discards))
+
+
+if __name__ == "__main__":
+    unittest.main()
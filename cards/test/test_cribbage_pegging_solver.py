@@ -0,0 +1,91 @@
+"""
+Tests for the exact pegging solver.
+"""
+
+import random
+import unittest
+from cards.cards.card import DECK
+from cards.cribbage.pegging import CardsInPlay, PlayedCard
+from cards.cribbage.pegging_solver import PeggingSolver, solve_pegging
+from cards.cribbage.players import Player
+from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
+
+PLAYERS = (Player.PLAYER1, Player.PLAYER2)
+
+
+def brute_force(cards_in_play, hands, turn):
+    """Return the best differential for the player to move by trying every line."""
+    if not hands[0] and not hands[1]:
+        return 0
+    player, opponent = PLAYERS[turn], PLAYERS[1 - turn]
+    playable = [c for c in hands[turn] if cards_in_play.score_play(PlayedCard(player, c))[0]]
+    best = None
+    for card in playable or [None]:
+        before = cards_in_play.points(player) - cards_in_play.points(opponent)
+        cards_in_play.push(player, card)
+        if card is not None:
+            hands[turn].remove(card)
+        gained = cards_in_play.points(player) - cards_in_play.points(opponent) - before
+        value = gained - brute_force(cards_in_play, hands, 1 - turn)
+        cards_in_play.pop()
+        if card is not None:
+            hands[turn].append(card)
+        best = value if best is None else max(best, value)
+    return best
+
+
+class TestPeggingSolver(unittest.TestCase):
+    """Test solving pegging."""
+
+    def test_matches_brute_force(self):
+        """Test the solver and its line against trying every line with CardsInPlay."""
+        rng = random.Random(11)
+        solver = PeggingSolver()
+        for _ in range(30):
+            cards = rng.sample(DECK, 8)
+            leader = rng.randrange(2)
+            hands = (cards[:4], cards[4:])
+            expected = brute_force(CardsInPlay(), [list(hands[0]), list(hands[1])], leader)
+            solution = solver.solve(hands, leader)
+            self.assertEqual(solution.differential, expected if leader == 0 else -expected)
+
+            cards_in_play = CardsInPlay()
+            remaining = [list(hands[0]), list(hands[1])]
+            for player, number in solution.line:
+                if number is None:
+                    cards_in_play.go(PLAYERS[player])
+                else:
+                    card = next(c for c in remaining[player] if c.number() == number)
+                    remaining[player].remove(card)
+                    cards_in_play.play(PLAYERS[player], card)
+            self.assertEqual(remaining, [[], []])
+            self.assertEqual(
+                cards_in_play.points(PLAYERS[0]) - cards_in_play.points(PLAYERS[1]),
+                solution.differential,
+            )
+
+    def test_fives(self):
+        """Test that leading fives into kings gives away each fifteen and a go."""
+        solution = solve_pegging(([H5, S5, C5, D5], [HK, SK, CK, DK]), leader=0)
+        self.assertEqual(solution.differential, -5)
+        self.assertEqual(solution.line[:4], [(0, 5), (1, 13), (0, 5), (1, 13)])
+
+    def test_count(self):
+        """Test starting from a count where the leader cannot play."""
+        solution = solve_pegging(([HK], [HA]), leader=0, count=25)
+        self.assertEqual(solution.line, [(0, None), (1, 1), (0, None), (1, None), (0, 13)])
+        self.assertEqual(solution.differential, -1)
+
+    def test_table_is_bounded(self):
+        """Test that a full transposition table is emptied before the next solve."""
+        solver = PeggingSolver(max_table_size=100)
+        hands = ([HA, H2, H3, H4], [S9, ST, SJ, SQ])
+        solver.solve(([H5, S5, C6, D7], [HK, SK, C8, D9]))
+        self.assertGreater(solver.table_size(), 100)
+        fresh = PeggingSolver()
+        self.assertEqual(solver.solve(hands), fresh.solve(hands))
+        self.assertEqual(solver.table_size(), fresh.table_size())
+
+
+if __name__ == "__main__":
+    unittest.main()
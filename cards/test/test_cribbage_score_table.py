@@ -0,0 +1,116 @@
+"""
+Tests for the precomputed cribbage score table.
+"""
+
+import os
+import random
+import tempfile
+import itertools
+import unittest
+from math import comb
+from unittest import mock
+from cards.cribbage import score_table
+from cards.cribbage.score_table import (
+    STARTERS,
+    ScoreTable,
+    build_score_table,
+    hand_index,
+    starter_index,
+    score_hand_lookup,
+)
+from cards.cribbage.scoring import np, score_hand_total
+from cards.cribbage.hand import Hand
+from cards.cards.card import Card, DECK
+from cards.cards.card_shortcuts import *  # pylint: disable=wildcard-import, unused-wildcard-import
+
+
+class TestScoreTableIndex(unittest.TestCase):
+    """Test the table indexing."""
+
+    def test_hand_index_is_a_bijection(self):
+        """Test that the hands in index order have consecutive indices."""
+        indices = [
+            hand_index(ids)
+            for ids in score_table._hands_in_index_order()  # pylint: disable=protected-access
+        ]
+        self.assertEqual(indices, list(range(comb(52, 4))))
+
+    def test_starter_index(self):
+        """Test the position of the starter among the remaining cards."""
+        self.assertEqual(starter_index((0, 1, 2, 3), 4), 0)
+        self.assertEqual(starter_index((0, 10, 20, 30), 51), 47)
+        self.assertEqual(starter_index((0, 10, 20, 30), 15), 13)
+
+
+class TestScoreTableLookup(unittest.TestCase):
+    """Test reading the table."""
+
+    def test_rejects_other_files(self):
+        """Test that a file that is not a table is rejected."""
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"not a table")
+        try:
+            with self.assertRaises(ValueError):
+                ScoreTable(f.name)
+        finally:
+            os.remove(f.name)
+
+    def test_lookup_matches_score_hand(self):
+        """Test that lookups give the same totals with or without the table."""
+        hand = Hand([HJ, D5, S5, C5])
+        self.assertEqual(score_hand_lookup(hand, H5), score_hand_total(hand, H5))
+        self.assertEqual(score_hand_lookup(hand, SK), score_hand_total(hand, SK))
+
+
+# The first C(16, 4) hands in index order are the hands of aces to fours.
+SMALL_HANDS = comb(16, 4)
+
+
+def small_table():
+    """Patch the table to only hold the hands of aces to fours, with every starter."""
+    hands_in_index_order = score_table._hands_in_index_order  # pylint: disable=protected-access
+    return mock.patch.multiple(
+        score_table,
+        HANDS=SMALL_HANDS,
+        VARIANT_SIZE=SMALL_HANDS * STARTERS,
+        TABLE_SIZE=len(score_table.MAGIC) + 2 * SMALL_HANDS * STARTERS,
+        _hands_in_index_order=lambda: itertools.islice(hands_in_index_order(), SMALL_HANDS),
+    )
+
+
+class TestScoreTableBuild(unittest.TestCase):
+    """Test building a table and reading it back."""
+
+    def check_build(self):
+        """Build a small table and check sampled lookups against score_hand."""
+        rng = random.Random(5)
+        small_cards = [Card.from_id(i) for i in range(16)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "score_table.bin")
+            build_score_table(path)
+            table = ScoreTable(path)
+            hands = [[HA, H2, H3, H4], [SA, S2, S3, S4], [HA, SA, CA, DA]]
+            hands += [rng.sample(small_cards, 4) for _ in range(100)]
+            for cards in hands:
+                for is_crib in (False, True):
+                    hand = Hand(cards, is_crib=is_crib)
+                    for starter in rng.sample([c for c in DECK if c not in cards], 8):
+                        self.assertEqual(
+                            table.score(hand, starter), score_hand_total(hand, starter)
+                        )
+            table.close()
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_build_with_numpy(self):
+        """Test the table built with the batch scorer."""
+        with small_table():
+            self.check_build()
+
+    def test_build_in_python(self):
+        """Test the table built in pure Python."""
+        with small_table(), mock.patch.object(score_table, "np", None):
+            self.check_build()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,9 +2,21 @@
 Tests for scoring hands in cribbage.
 """
 
+import random
 import unittest
+from cards.cards.card import DECK, rest_of_deck
 from cards.cribbage.scoring import (
+    np,
+    score_hand,
+    score_hands_batch,
+    score_hand_total,
+    starter_distribution,
+    starter_classes,
+    expected_score,
     score_hand_fifteens,
+    FifteenCounter,
+    count_fifteens,
+    card_value,
     score_hand_pairs,
     score_hand_flush,
     score_hand_runs,
@@ -52,6 +64,22 @@ class TestScoringFifteen(unittest.TestCase):
         score, _ = score_hand_fifteens(hand, starter)
         self.assertEqual(score, 8)
 
+    def test_counter_matches_enumeration(self):
+        """Test that the subset-sum counter matches enumerating the fifteens."""
+        rng = random.Random(1)
+        for _ in range(500):
+            cards = rng.sample(DECK, 5)
+            _, fifteens = score_hand_fifteens(Hand(cards[:4]), cards[4])
+            self.assertEqual(count_fifteens(card_value(c) for c in cards), len(fifteens))
+
+    def test_counter_add_card(self):
+        """Test adding a starter to a 4 card counter."""
+        counter = FifteenCounter([10, 5, 5, 5])
+        self.assertEqual(counter.fifteens(), 4)
+        self.assertEqual(counter.fifteens_with(5), 8)
+        self.assertEqual(counter.add(5).fifteens(), 8)
+        self.assertEqual(counter.fifteens(), 4)
+
 
 class TestScoringPair(unittest.TestCase):
     """Test scoring pairs."""
@@ -279,5 +307,98 @@ class TestScoringRuns(unittest.TestCase):
         self.assertEqual(score, 0)
 
 
+class TestScoreHandTotal(unittest.TestCase):
+    """Test the memoized total score against the full scorer."""
+
+    def test_known_hands(self):
+        """Test some well known hands."""
+        self.assertEqual(score_hand_total(Hand([HJ, D5, S5, C5]), H5), 29)
+        self.assertEqual(score_hand_total(Hand([H3, D4, S4, C5]), H3), 20)
+        self.assertEqual(score_hand_total(Hand([H2, H4, H6, H8]), SK), 4)
+        self.assertEqual(score_hand_total(Hand([H2, H4, H6, H8], is_crib=True), SK), 0)
+        self.assertEqual(score_hand_total(Hand([H2, H4, H6, H8], is_crib=True), HK), 5)
+        self.assertEqual(score_hand_total(Hand([H2, H4, H6, HJ], is_crib=True), HK), 6)
+
+    def test_matches_score_hand(self):
+        """Test that the totals match score_hand on random hands."""
+        rng = random.Random(0)
+        for _ in range(2000):
+            cards = rng.sample(DECK, 5)
+            hand = Hand(cards[:4], is_crib=rng.random() < 0.5)
+            self.assertEqual(score_hand_total(hand, cards[4]), score_hand(hand, cards[4])[0])
+
+    def test_no_explanation(self):
+        """Test that explanations are skipped when not asked for."""
+        self.assertEqual(score_hand(Hand([HJ, D5, S5, C5]), H5, explain=False), (29, None))
+
+
+class TestStarterDistribution(unittest.TestCase):
+    """Test the distribution of scores over the possible starters."""
+
+    def test_matches_score_hand(self):
+        """Test that every starter's score matches score_hand."""
+        for cards, is_crib in [([HJ, D5, S5, C5], False), ([H2, H4, H6, HJ], True)]:
+            hand = Hand(cards, is_crib=is_crib)
+            remaining = rest_of_deck(cards)
+            distribution = starter_distribution(hand, remaining)
+            self.assertEqual(len(distribution.scores), 48)
+            for starter in remaining:
+                self.assertEqual(distribution.scores[starter], score_hand(hand, starter)[0])
+
+    def test_statistics(self):
+        """Test the summary statistics."""
+        hand = Hand([HJ, D5, S5, C5])
+        distribution = starter_distribution(hand, [H5, SK, C2])
+        self.assertEqual(distribution.histogram, {14: 1, 20: 1, 29: 1})
+        self.assertEqual(distribution.mean, 21)
+        self.assertAlmostEqual(distribution.variance, (49 + 1 + 64) / 3)
+        self.assertEqual((distribution.min, distribution.max), (14, 29))
+
+    def test_starter_classes(self):
+        """Test that starters are grouped by rank unless their suit matters."""
+        no_suits = Hand([H2, D4, S6, C8])
+        self.assertEqual(len(starter_classes(no_suits, rest_of_deck(no_suits.cards()))), 13)
+        jack = Hand([H2, D4, S6, CJ])
+        classes = starter_classes(jack, rest_of_deck(jack.cards()))
+        self.assertEqual(len(classes), 25)
+        self.assertEqual(sum(len(members) for members in classes), 48)
+
+    def test_expected_score(self):
+        """Test that the class weighted average matches the average over all starters."""
+        for cards, is_crib in [([HJ, D5, S5, C5], False), ([H2, H4, H6, HJ], False)]:
+            hand = Hand(cards, is_crib=is_crib)
+            remaining = rest_of_deck(cards)
+            average = sum(score_hand(hand, s)[0] for s in remaining) / len(remaining)
+            self.assertEqual(expected_score(hand, remaining), average)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestScoreHandsBatch(unittest.TestCase):
+    """Test the NumPy batch scorer against score_hand."""
+
+    def test_best_hand(self):
+        """Test the best possible hand."""
+        hand = [HJ.id(), D5.id(), S5.id(), C5.id()]
+        self.assertEqual(score_hands_batch([hand], [H5.id()]).tolist(), [29])
+
+    def test_matches_score_hand(self):
+        """Test totals and categories against score_hand on random hands."""
+        rng = random.Random(2)
+        samples = [rng.sample(DECK, 7) for _ in range(300)]
+        is_crib = [rng.random() < 0.5 for _ in samples]
+        hands = [[c.id() for c in cards[:4]] for cards in samples]
+        starters = [[c.id() for c in cards[4:]] for cards in samples]
+        totals = score_hands_batch(hands, starters, is_crib)
+        details = score_hands_batch(hands, [s[0] for s in starters], is_crib, categories=True)
+        for i, cards in enumerate(samples):
+            hand = Hand(cards[:4], is_crib=is_crib[i])
+            for k, starter in enumerate(cards[4:]):
+                self.assertEqual(totals[i, k], score_hand(hand, starter)[0])
+            _, explanation = score_hand(hand, cards[4])
+            self.assertEqual(
+                [details[j][i] for j in range(1, 6)], [score.total for score in explanation]
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,57 @@
+"""
+Tests for the scoring verification harness.
+"""
+
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+from cards.cribbage import verify
+from cards.cribbage.verify import verify_chunk, chunk_cases, number_of_chunks, read_checkpoint
+
+
+class TestVerify(unittest.TestCase):
+    """Test verifying scoring engines."""
+
+    def test_chunk_cases(self):
+        """Test that a chunk covers every starter and flush rule for its hands."""
+        cases = chunk_cases(0, chunk_size=2)
+        self.assertEqual(len(cases), 2 * 2 * 48)
+        self.assertEqual(number_of_chunks(1000), 271)
+
+    def test_engines_agree(self):
+        """Test that the built in engines match the reference on a chunk."""
+        for engine in ["total", "partial", "lookup"]:
+            result = verify_chunk(engine, 100, chunk_size=3)
+            self.assertEqual(result.mismatches, [])
+
+    def test_mismatch_reported(self):
+        """Test that a wrong engine is caught with the cards involved."""
+        wrong = lambda cases: [0 for _ in cases]  # pylint: disable=unnecessary-lambda-assignment
+        with mock.patch.dict(verify.ENGINES, {"wrong": wrong}):
+            result = verify_chunk("wrong", 0, chunk_size=1)
+        self.assertEqual(result.cases, 96)
+        self.assertTrue(all(m.actual == 0 and m.expected > 0 for m in result.mismatches))
+        self.assertEqual(result.mismatches[0].hand, [0, 1, 2, 3])
+
+    def test_resume_with_other_engine(self):
+        """Test that chunks checkpointed by another engine or chunk size are verified again."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                for engine, chunk_size in (("batch", 1), ("total", 2)):
+                    record = {"engine": engine, "chunk_size": chunk_size, "chunk": 0}
+                    f.write(json.dumps({**record, "cases": 96, "mismatches": [], "seconds": 0}))
+                    f.write("\n")
+            self.assertEqual(read_checkpoint(path, "total", 1), {})
+            self.assertEqual(list(read_checkpoint(path, "batch", 1)), [0])
+
+            verify.verify("total", processes=1, chunk_size=1, chunks=range(1), checkpoint=path)
+            finished = read_checkpoint(path, "total", 1)
+            self.assertEqual(list(finished), [0])
+            self.assertGreater(finished[0]["seconds"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Tests for the deal engine.
+"""
+
+import unittest
+from math import factorial
+from cards.cards.card import DECK, CARDS, shuffled
+from cards.cards.deal import (
+    DealEngine,
+    partition_games,
+    game_engines,
+    deck_from_permutation_index,
+    permutation_index,
+)
+
+
+class TestDealEngine(unittest.TestCase):
+    """Tests for the DealEngine class."""
+
+    def test_seeded_shuffle_is_reproducible(self):
+        """Test that the same seed gives the same deck."""
+        self.assertEqual(DealEngine(7).shuffled(DECK), DealEngine(7).shuffled(DECK))
+        self.assertEqual(shuffled(DECK, DealEngine(7)), DealEngine(7).shuffled(DECK))
+        self.assertNotEqual(DealEngine(7).shuffled(DECK), DealEngine(8).shuffled(DECK))
+
+    def test_shuffle_does_not_copy_cards(self):
+        """Test that shuffling reuses the interned cards."""
+        deck = DealEngine(1).shuffled(DECK)
+        self.assertEqual(sorted(deck, key=lambda c: c.id()), list(CARDS))
+        self.assertTrue(all(any(c is d for d in DECK) for c in deck))
+
+    def test_games_independent_of_partition(self):
+        """Test that game k of a batch is the same no matter how the batch is split."""
+        serial = {k: e.shuffled() for k, e in game_engines(42, range(10))}
+        parallel = {}
+        for games in partition_games(10, 3):
+            parallel.update({k: e.shuffled() for k, e in game_engines(42, games)})
+        self.assertEqual(serial, parallel)
+        self.assertEqual(DealEngine.for_game(42, 6).shuffled(), serial[6])
+
+    def test_partition_games(self):
+        """Test that partitions cover the games without overlapping."""
+        ranges = partition_games(10, 3)
+        self.assertEqual([list(r) for r in ranges], [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+    def test_permutation_index_round_trip(self):
+        """Test permutation indices."""
+        self.assertEqual(deck_from_permutation_index(0), list(CARDS))
+        self.assertEqual(deck_from_permutation_index(factorial(52) - 1), list(reversed(CARDS)))
+        index = DealEngine(3).permutation_index()
+        self.assertEqual(permutation_index(deck_from_permutation_index(index)), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
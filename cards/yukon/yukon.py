@@ -5,8 +5,9 @@ A version of solitaire caled Yukon.
 from typing import Union, List
 from collections import namedtuple
 
-from cards.cards.card import Suit, Card, KING, ACE, shuffled, DECK
+from cards.cards.card import Suit, Card, CardSet, KING, ACE, shuffled, DECK
 from cards.cards.card_shortcuts import card_shortcut_dict
+from cards.cards.deal import DealEngine
 
 
 class Foundation:
@@ -14,6 +15,7 @@ class Foundation:
 
     def __init__(self):
         self.foundations = {e: None for e in Suit}
+        self.built = CardSet()
 
     def __repr__(self) -> str:
         return "\n".join(
@@ -25,7 +27,7 @@ class Foundation:
 
     def can_build(self, card) -> bool:
         """Returns true if the card can be build on the foundation."""
-        return Card.lower_card(card) in self.foundations.values() or card.number() == ACE
+        return card.number() == ACE or Card.lower_card(card) in self.built
 
     def build(self, card) -> None:
         """Build the foundation by adding the card."""
@@ -37,6 +39,7 @@ class Foundation:
         else:
             assert self.foundations[card.suit()] == Card.lower_card(card)
             self.foundations[card.suit()] = card
+        self.built = self.built.add(card)
 
 
 class Pile:
@@ -340,9 +343,9 @@ class Board:
         raise ValueError()
 
 
-def play():
+def play(deal_engine: Union[DealEngine, None] = None):
     """Play a game of Yukon."""
-    b = Board(shuffled(DECK))
+    b = Board(shuffled(DECK, deal_engine))
     feedback = None
     while True:
         if feedback == "No Show":